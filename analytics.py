@@ -0,0 +1,226 @@
+# analytics.py
+import atexit
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+import click
+from flask import Blueprint, abort, request
+from flask.cli import with_appcontext
+from flask_login import current_user, login_required
+from sqlalchemy import insert, text
+
+from extensions import db
+from models import Video, WatchEvent, WatchSession, RollupState
+from passwords import TokenBucket
+from utils import has_purchased
+
+bp = Blueprint('analytics', __name__)
+
+EVENT_KINDS = {'view', 'progress', 'ended'}
+MAX_EVENTS_PER_BEACON = 50
+EVENTS_PER_PLAY_MINUTE = 10  # The player sends a heartbeat every 15 seconds of playback
+PLAYS_PER_HOUR = 10  # New play sessions per user and video, each one a view
+ROLLUP_NAME = 'watch'
+
+
+class EventBuffer:
+    """Bounded in-memory ring buffer of pending events.
+
+    When the flusher falls behind, the oldest events are overwritten rather
+    than letting request threads block or memory grow.
+    """
+
+    def __init__(self, maxsize=50000, batch_size=500):
+        self.batch_size = batch_size
+        self._events = deque(maxlen=maxsize)
+        self._lock = threading.Lock()
+        self.ready = threading.Event()
+        self.dropped = 0
+
+    def append(self, event):
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            full = len(self._events) >= self.batch_size
+        if full:
+            self.ready.set()
+
+    def drain(self):
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+            self.ready.clear()
+        return events
+
+    def __len__(self):
+        return len(self._events)
+
+
+buffer = EventBuffer()
+
+
+class PlayLimiter:
+    """Caps what one user can report: new plays per video, and events per play.
+
+    Every play session counts as a view, so without a cap a client could
+    inflate view_count by inventing play ids. Like the login limiters,
+    state is per process.
+    """
+
+    def __init__(self, plays_per_hour=PLAYS_PER_HOUR, events_per_minute=EVENTS_PER_PLAY_MINUTE,
+                 max_plays=100000):
+        self.plays = TokenBucket(plays_per_hour / 60, capacity=plays_per_hour)
+        self.events = TokenBucket(events_per_minute, capacity=2 * events_per_minute)
+        self.max_plays = max_plays
+        self._admitted = OrderedDict()  # (user id, video id, play id) of known plays
+        self._lock = threading.Lock()
+
+    def allow(self, user_id, video_id, play_id):
+        play = (user_id, video_id, play_id)
+        with self._lock:
+            known = play in self._admitted
+            if known:
+                self._admitted.move_to_end(play)
+        if not known:
+            if not self.plays.allow((user_id, video_id)):
+                return False
+            with self._lock:
+                self._admitted[play] = True
+                if len(self._admitted) > self.max_plays:
+                    self._admitted.popitem(last=False)
+        return self.events.allow(play)
+
+
+limiter = PlayLimiter()
+
+
+def _parse_event(video_id, data):
+    if not isinstance(data, dict) or data.get('kind') not in EVENT_KINDS:
+        return None
+    play_id = str(data.get('play_id') or '')[:32]
+    if not play_id:
+        return None
+    try:
+        position = max(float(data.get('position') or 0), 0.0)
+        duration = float(data['duration']) if data.get('duration') else None
+    except (TypeError, ValueError):
+        return None
+    return {'video_id': video_id, 'play_id': play_id, 'kind': data['kind'],
+            'position': position, 'duration': duration, 'created_at': datetime.utcnow()}
+
+
+@bp.route("/video/<int:video_id>/events", methods=['POST'])
+@login_required
+def video_events(video_id):
+    # Only purchasers see the player, so only they can report on it
+    video = Video.get_active_or_404(video_id)
+    if not has_purchased(current_user.id, video.id):
+        abort(403)
+    # Beacons only touch memory; the flusher writes them in batches
+    payload = request.get_json(force=True, silent=True)
+    items = payload.get('events') if isinstance(payload, dict) and 'events' in payload else [payload]
+    limited = False
+    for item in (items or [])[:MAX_EVENTS_PER_BEACON]:
+        event = _parse_event(video.id, item)
+        if not event:
+            continue
+        if limiter.allow(current_user.id, video.id, event['play_id']):
+            buffer.append(event)
+        else:
+            limited = True
+    return '', 429 if limited else 204
+
+
+def flush_events():
+    """Insert everything buffered in one executemany; returns the count"""
+    events = buffer.drain()
+    if events:
+        db.session.execute(insert(WatchEvent), events)
+        db.session.commit()
+    return len(events)
+
+
+def rollup_watch_stats():
+    """Fold new events into per-play progress and per-video columns.
+
+    Only events after the stored high-water mark are read, and only the
+    videos they mention are updated.
+    """
+    state = db.session.get(RollupState, ROLLUP_NAME) or RollupState(name=ROLLUP_NAME, last_id=0)
+    max_id = db.session.query(db.func.max(WatchEvent.id)).scalar() or 0
+    if max_id <= state.last_id:
+        return 0
+    window = {'last': state.last_id, 'max': max_id}
+    events, sessions, videos = (WatchEvent.__tablename__, WatchSession.__tablename__,
+                                Video.__tablename__)
+
+    db.session.execute(text(f"""
+        INSERT INTO {sessions} (video_id, play_id, max_fraction)
+        SELECT video_id, play_id, MAX(
+            CASE WHEN kind = 'ended' OR (duration > 0 AND position >= duration) THEN 1.0
+                 WHEN duration > 0 THEN position / duration
+                 ELSE 0.0 END)
+        FROM {events}
+        WHERE id > :last AND id <= :max
+        GROUP BY video_id, play_id
+        ON CONFLICT (video_id, play_id) DO UPDATE SET max_fraction =
+            CASE WHEN excluded.max_fraction > {sessions}.max_fraction
+                 THEN excluded.max_fraction ELSE {sessions}.max_fraction END
+    """), window)
+    touched = db.session.execute(text(f"""
+        UPDATE {videos} SET
+            view_count = (SELECT COUNT(*) FROM {sessions} s WHERE s.video_id = {videos}.id),
+            avg_watch_pct = COALESCE(
+                (SELECT AVG(s.max_fraction) * 100 FROM {sessions} s WHERE s.video_id = {videos}.id), 0)
+        WHERE id IN (SELECT DISTINCT video_id FROM {events} WHERE id > :last AND id <= :max)
+    """), window).rowcount
+
+    state.last_id = max_id
+    db.session.add(state)
+    db.session.commit()
+    return touched
+
+
+def start_event_flusher(app):
+    """Flush buffered events on a daemon thread and roll them up periodically"""
+    interval = app.config.get('EVENT_FLUSH_INTERVAL_MS', 2000) / 1000
+    rollup_interval = app.config.get('EVENT_ROLLUP_INTERVAL', 60)
+    buffer.batch_size = app.config.get('EVENT_FLUSH_BATCH', 500)
+
+    def flush(rollup=False):
+        with app.app_context():
+            try:
+                flush_events()
+                if rollup:
+                    rollup_watch_stats()
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Event flush failed')
+            finally:
+                db.session.remove()
+
+    def run():
+        last_rollup = time.monotonic()
+        while True:
+            # Wake early when a full batch is waiting
+            buffer.ready.wait(interval)
+            due = time.monotonic() - last_rollup >= rollup_interval
+            flush(rollup=due)
+            if due:
+                last_rollup = time.monotonic()
+
+    thread = threading.Thread(target=run, name='event-flusher', daemon=True)
+    thread.start()
+    # Don't lose what is still buffered when the worker exits
+    atexit.register(flush)
+    return thread
+
+
+@click.command('rollup-events')
+@with_appcontext
+def rollup_events_command():
+    """Flush buffered events and update per-video watch statistics."""
+    flush_events()
+    click.echo(f"Updated watch statistics for {rollup_watch_stats()} videos")
@@ -2,18 +2,130 @@ import streamlit as st
 import sqlite3
 import os
 from PIL import Image
-import pandas as pd
 import re
 from datetime import date
 import base64
+import hashlib
+import html
 from io import BytesIO
-import uuid
 from datetime import datetime, timedelta
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-import urllib.parse
+import lesson_db
+import lesson_calendar
+import lesson_export
+import lesson_gcal
+import lesson_images
+import lesson_schedule
+
+# How far ahead students can book
+BOOKING_WEEKS_AHEAD = 4
+
+OFFERING_GRID_CSS = """
+<style>
+.offering-grid {
+    display: grid;
+    grid-template-columns: repeat(auto-fill, minmax(280px, 1fr));
+    gap: 20px;
+}
+.offering-card {
+    border: 1px solid #e0e0e0;
+    border-radius: 10px;
+    padding: 20px;
+    box-shadow: 2px 2px 12px rgba(0,0,0,0.1);
+    transition: transform 0.2s;
+    background-color: #ffffff;
+    display: flex;
+    flex-direction: column;
+    justify-content: space-between;
+}
+.offering-card:hover {
+    transform: scale(1.02);
+    box-shadow: 4px 4px 20px rgba(0,0,0,0.2);
+}
+.offering-image {
+    width: 100%;
+    height: 200px;
+    object-fit: cover;
+    border-radius: 10px 10px 0 0;
+    background-color: #f0f0f0;
+}
+.offering-title {
+    font-size: 1.5rem;
+    font-weight: bold;
+    margin-top: 15px;
+    margin-bottom: 10px;
+    text-align: center;
+}
+.offering-description {
+    font-size: 1rem;
+    color: #555555;
+    margin-bottom: 15px;
+    text-align: center;
+    flex-grow: 1;
+}
+.offering-price {
+    font-size: 1.2rem;
+    font-weight: bold;
+    color: #007AFF;
+    margin-bottom: 15px;
+    text-align: center;
+}
+</style>
+"""
+
+
+def offerings_version(offerings):
+    """Hash of everything the grid shows; changes whenever an offering does"""
+    return hashlib.sha1(repr(offerings).encode('utf-8')).hexdigest()
+
+
+def legacy_image_data_uri(image_path):
+    """Inline copy of an image stored before images were served by URL"""
+    try:
+        with Image.open(image_path) as img:
+            img.thumbnail((400, 400), Image.Resampling.LANCZOS)
+            if img.mode in ('RGBA', 'P'):
+                img = img.convert('RGB')
+            buffer = BytesIO()
+            img.save(buffer, format='JPEG', optimize=True, quality=85)
+        return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+    except Exception as e:
+        print(f"Error loading image {image_path}: {e}")
+        return None
+
+
+def offering_image_html(image_path, alt):
+    srcset = ', '.join(
+        f"{lesson_images.image_url(lesson_images.variant_path(image_path, width))} {width}w"
+        for width in lesson_images.IMAGE_WIDTHS
+        if os.path.exists(lesson_images.variant_path(image_path, width))
+    )
+    url = lesson_images.image_url(image_path)
+    if url and srcset:
+        webp = srcset.replace('.jpg ', '.webp ')
+        # Cards are at most ~400px wide; the browser picks the variant
+        return (f'<picture><source type="image/webp" srcset="{webp}" sizes="400px">'
+                f'<img src="{url}" srcset="{srcset}" sizes="400px" class="offering-image" '
+                f'alt="{alt}" loading="lazy" decoding="async"></picture>')
+    src = url if url and os.path.exists(image_path) else legacy_image_data_uri(image_path)
+    if src:
+        return f'<img src="{src}" class="offering-image" alt="{alt}" loading="lazy" decoding="async">'
+    return '<div class="offering-image">No image available</div>'
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def offerings_grid_html(version, _offerings):
+    """The whole offerings grid as one HTML string, cached by `version`"""
+    cards = []
+    for offering in _offerings:
+        image_html = offering_image_html(offering[4], html.escape(offering[1])) if offering[4] else ""
+        cards.append(f"""
+        <div class="offering-card">
+            {image_html}
+            <div class="offering-title">{html.escape(offering[1])}</div>
+            <div class="offering-description">{html.escape(offering[2] or '')}</div>
+            <div class="offering-price">{html.escape(str(offering[3]))}</div>
+        </div>""")
+    return OFFERING_GRID_CSS + '<div class="offering-grid">' + ''.join(cards) + '</div>'
 
 class JazzWoodwindsLessons:
     def __init__(self):
@@ -22,126 +134,21 @@ class JazzWoodwindsLessons:
             page_icon="🎷",
             layout="wide"
         )
-        self.inject_custom_css()
-        self.update_database_schema()
         self.init_database()
+        # Pushes confirmed and completed bookings to Google Calendar off the UI thread
+        lesson_gcal.start_worker()
 
         if 'active_booking_id' not in st.session_state:
             st.session_state['active_booking_id'] = None
 
-    def inject_custom_css(self):
-        custom_css = """
-        <style>
-        .offering-card {
-            border: 1px solid #e0e0e0;
-            border-radius: 10px;
-            padding: 20px;
-            margin: 10px;
-            box-shadow: 2px 2px 12px rgba(0,0,0,0.1);
-            transition: transform 0.2s;
-            background-color: #ffffff;
-            height: 100%;
-            display: flex;
-            flex-direction: column;
-            justify-content: space-between;
-        }
-        .offering-card:hover {
-            transform: scale(1.02);
-            box-shadow: 4px 4px 20px rgba(0,0,0,0.2);
-        }
-        .offering-image {
-            width: 100%;
-            height: 200px;
-            object-fit: cover;
-            border-radius: 10px 10px 0 0;
-        }
-        .offering-title {
-            font-size: 1.5rem;
-            font-weight: bold;
-            margin-top: 15px;
-            margin-bottom: 10px;
-            text-align: center;
-        }
-        .offering-description {
-            font-size: 1rem;
-            color: #555555;
-            margin-bottom: 15px;
-            text-align: center;
-            flex-grow: 1;
-        }
-        .offering-price {
-            font-size: 1.2rem;
-            font-weight: bold;
-            color: #007AFF;
-            margin-bottom: 15px;
-            text-align: center;
-        }
-        .book-button {
-            display: flex;
-            justify-content: center;
-        }
-        </style>
-        """
-        st.markdown(custom_css, unsafe_allow_html=True)
-
-
-    def update_database_schema(self):
-        conn = sqlite3.connect('jazz_woodwinds.db')
-        c = conn.cursor()
-        
-        # Add new columns if they don't exist
-        try:
-            c.execute("ALTER TABLE lesson_bookings ADD COLUMN status TEXT DEFAULT 'Pending'")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            c.execute("ALTER TABLE lesson_bookings ADD COLUMN admin_notes TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        conn.commit()
-        conn.close()
-
     def init_database(self):
-        pass
-
-    def get_image_base64(self, image_path):
-        """Convert image to base64 string with caching"""
-        if not image_path:
-            return ""
-        
-        # Use session state for caching
-        cache_key = f"image_cache_{image_path}"
-        if cache_key in st.session_state:
-            return st.session_state[cache_key]
-        
-        try:
-            with Image.open(image_path) as img:
-                # Resize image to reduce size while maintaining aspect ratio
-                max_size = (800, 800)
-                img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                
-                # Convert to RGB if needed
-                if img.mode in ('RGBA', 'P'):
-                    img = img.convert('RGB')
-                
-                # Save to buffer with optimization
-                buffer = BytesIO()
-                img.save(buffer, format='JPEG', optimize=True, quality=85)
-                img_str = base64.b64encode(buffer.getvalue()).decode()
-                
-                # Cache the result
-                st.session_state[cache_key] = img_str
-                return img_str
-        except Exception as e:
-            print(f"Error loading image {image_path}: {e}")
-            return ""
+        """Apply pending schema migrations (a no-op after the first run)"""
+        lesson_db.migrate()
 
     def fetch_offerings(self):
         conn = sqlite3.connect('jazz_woodwinds.db')
         c = conn.cursor()
-        c.execute("SELECT id, name, description, price, image_path FROM lesson_offerings")
+        c.execute("SELECT id, name, description, price, image_path, duration_minutes FROM lesson_offerings")
         offerings = c.fetchall()
         conn.close()
         return offerings
@@ -160,20 +167,11 @@ class JazzWoodwindsLessons:
                 b.preferred_time, 
                 b.musical_goals,
                 b.status,
-                b.admin_notes
+                b.admin_notes,
+                b.starts_at
             FROM lesson_bookings b
             JOIN lesson_offerings o ON b.lesson_id = o.id
-            ORDER BY 
-                CASE b.preferred_day
-                    WHEN 'Monday' THEN 1
-                    WHEN 'Tuesday' THEN 2
-                    WHEN 'Wednesday' THEN 3
-                    WHEN 'Thursday' THEN 4
-                    WHEN 'Friday' THEN 5
-                    WHEN 'Saturday' THEN 6
-                    WHEN 'Sunday' THEN 7
-                END,
-                b.preferred_time
+            ORDER BY b.starts_at
         ''')
         bookings = c.fetchall()
         conn.close()
@@ -194,57 +192,60 @@ class JazzWoodwindsLessons:
         st.markdown("<h2 style='text-align: center; margin-top: 50px;'>Our Offerings</h2>", unsafe_allow_html=True)
         offerings = self.fetch_offerings()
         if offerings:
-            num_columns = 3 if len(offerings) > 2 else len(offerings)
-            cols = st.columns(num_columns)
-            for idx, offering in enumerate(offerings):
-                with cols[idx % num_columns]:
-                    self.render_offering_card(offering)
+            # One element, rebuilt only when an offering changes
+            st.html(offerings_grid_html(offerings_version(offerings), offerings))
+            self.render_booking_section(offerings)
         else:
             st.info("No offerings available yet. Check back soon!")
 
-        if st.session_state['active_booking_id'] is not None:
-            selected_offering = next((off for off in offerings if off[0] == st.session_state['active_booking_id']), None)
-            if selected_offering:
-                self.render_booking_form(selected_offering)
-
-    def render_offering_card(self, offering):
-        image_html = ""
-        if offering[4]:  # If there's an image path
-            base64_img = self.get_image_base64(offering[4])
-            if base64_img:
-                image_html = f'<img src="data:image/jpeg;base64,{base64_img}" class="offering-image" alt="{offering[1]}">'
-            else:
-                image_html = '<div class="offering-image" style="background-color: #f0f0f0;">No image available</div>'
-        
-        card_html = f"""
-        <div class="offering-card">
-            {image_html}
-            <div class="offering-title">{offering[1]}</div>
-            <div class="offering-description">{offering[2]}</div>
-            <div class="offering-price">{offering[3]}</div>
-        </div>
-        """
-        st.markdown(card_html, unsafe_allow_html=True)
-        if st.button("Book This Lesson", key=f"book_{offering[0]}"):
-            st.session_state['active_booking_id'] = offering[0]
+    @st.fragment
+    def render_booking_section(self, offerings):
+        """Lesson picker and booking form; reruns without redrawing the grid"""
+        by_id = {offering[0]: offering for offering in offerings}
+        ids = list(by_id)
+        active = st.session_state['active_booking_id']
+        col1, col2 = st.columns([3, 1], vertical_alignment="bottom")
+        with col1:
+            choice = st.selectbox(
+                "Choose a lesson",
+                ids,
+                index=ids.index(active) if active in by_id else 0,
+                format_func=lambda offering_id: by_id[offering_id][1],
+            )
+        with col2:
+            if st.button("Book This Lesson", use_container_width=True):
+                st.session_state['active_booking_id'] = choice
+
+        active = st.session_state['active_booking_id']
+        if active in by_id:
+            self.render_booking_form(by_id[active])
 
     def render_booking_form(self, offering):
         st.markdown(f"### Book Lesson: {offering[1]}")
+
+        # Outside the form so changing the week refreshes the open slots
+        this_week = lesson_schedule.week_start(date.today())
+        weeks = [this_week + timedelta(weeks=n) for n in range(BOOKING_WEEKS_AHEAD)]
+        week = st.selectbox(
+            "Week",
+            weeks,
+            format_func=lambda w: f"Week of {w.strftime('%B %d')}",
+            key=f"booking_week_{offering[0]}"
+        )
+        slots = lesson_schedule.availability.available_slots(offering[5], week)
+        if not slots:
+            st.info("No open slots this week. Please choose another week.")
+            return
+
         with st.form(key=f"booking_form_{offering[0]}", clear_on_submit=True):
             student_name = st.text_input("Student Name")
             student_email = st.text_input("Student Email")
             
-            # Dropdown for Preferred Day
-            preferred_day = st.selectbox(
-                "Preferred Day",
-                ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-            )
-            
-            # Dropdown for Preferred Time
-            preferred_time = st.selectbox(
-                "Preferred Time",
-                ["8:00 AM", "9:00 AM", "10:00 AM", "11:00 AM", "12:00 PM", 
-                 "1:00 PM", "2:00 PM", "3:00 PM", "4:00 PM", "5:00 PM", "6:00 PM"]
+            # Only slots that are still open can be chosen
+            slot = st.selectbox(
+                "Lesson Time",
+                slots,
+                format_func=lambda s: f"{s.strftime('%A, %B %d')} at {lesson_schedule.format_time(s.time())}"
             )
             
             musical_goals = st.text_area("What are your musical goals?")
@@ -257,19 +258,14 @@ class JazzWoodwindsLessons:
                     st.error("Please enter a valid email address.")
                 else:
                     try:
-                        # Save the booking to the database
-                        conn = sqlite3.connect('jazz_woodwinds.db')
-                        c = conn.cursor()
-                        c.execute("""
-                            INSERT INTO lesson_bookings 
-                            (lesson_id, student_name, student_email, preferred_day, preferred_time, musical_goals)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                        """, (offering[0], student_name, student_email, preferred_day, preferred_time, musical_goals))
-                        conn.commit()
-                        conn.close()
-                        
+                        lesson_schedule.book_slot(
+                            offering[0], student_name, student_email, slot,
+                            offering[5], musical_goals
+                        )
                         st.success(f"Thank you, {student_name}! Your booking for {offering[1]} has been submitted.")
                         st.session_state['active_booking_id'] = None
+                    except lesson_schedule.SlotUnavailable:
+                        st.error("Sorry, that time was just booked. Please pick another slot.")
                     except Exception as e:
                         st.error(f"Error saving booking: {str(e)}")
 
@@ -299,7 +295,7 @@ class JazzWoodwindsLessons:
         st.title("Admin Dashboard")
         st.markdown("---")
         
-        tab1, tab2 = st.tabs(["📚 Lesson Offerings", "📋 Bookings"])
+        tab1, tab2, tab3 = st.tabs(["📚 Lesson Offerings", "📋 Bookings", "📊 Analytics"])
         
         with tab1:
             st.header("Manage Lesson Offerings")
@@ -311,6 +307,8 @@ class JazzWoodwindsLessons:
                     with col1:
                         name = st.text_input("Lesson Name", placeholder="e.g., Beginner Saxophone")
                         price = st.text_input("Price", placeholder="e.g., $50/hour")
+                        duration = st.number_input("Duration (minutes)", min_value=15, max_value=240,
+                            value=lesson_schedule.DEFAULT_DURATION, step=15)
                     with col2:
                         description = st.text_area("Description", 
                             placeholder="Describe what students will learn in this lesson...",
@@ -325,49 +323,49 @@ class JazzWoodwindsLessons:
                             st.error("Please fill in all required fields!")
                         else:
                             try:
-                                image_path = None
-                                if image_file:
-                                    if not os.path.exists('images'):
-                                        os.makedirs('images')
-                                    image_filename = f"images/{uuid.uuid4()}.jpg"
-                                    with Image.open(image_file) as img:
-                                        # Convert to RGB if needed
-                                        if img.mode in ('RGBA', 'P'):
-                                            img = img.convert('RGB')
-                                        # Resize image to a standard size
-                                        img.thumbnail((800, 800))
-                                        img.save(image_filename, format='JPEG', quality=85, optimize=True)
-                                    image_path = image_filename
-                                
                                 conn = sqlite3.connect('jazz_woodwinds.db')
                                 c = conn.cursor()
                                 c.execute("""
-                                    INSERT INTO lesson_offerings (name, description, price, image_path)
-                                    VALUES (?, ?, ?, ?)
-                                """, (name, description, price, image_path))
+                                    INSERT INTO lesson_offerings (name, description, price, image_path, duration_minutes)
+                                    VALUES (?, ?, ?, ?, ?)
+                                """, (name, description, price, None, duration))
+                                offering_id = c.lastrowid
                                 conn.commit()
                                 conn.close()
+
+                                if image_file:
+                                    # Resizing runs in the background; image_path is
+                                    # filled in once the variants are written
+                                    lesson_images.submit_offering_image(offering_id, image_file.getvalue())
                                 
                                 st.success("✅ New lesson type added successfully!")
                                 st.rerun()
                             except Exception as e:
                                 st.error(f"❌ Error adding lesson: {str(e)}")
             
+            if lesson_images.pending_jobs():
+                self.render_image_progress()
+
             # View/Delete Offerings Section
             st.markdown("---")
             st.subheader("Current Lesson Types")
             offerings = self.fetch_offerings()
+            image_jobs = lesson_images.pending_jobs()
             if offerings:
                 for offering in offerings:
                     with st.container():
                         col1, col2, col3 = st.columns([2, 3, 1])
                         with col1:
                             if offering[4]:  # if there's an image
-                                try:
-                                    img = Image.open(offering[4])
-                                    st.image(img, width=200)
-                                except:
+                                thumb = lesson_images.thumbnail_path(offering[4])
+                                if os.path.exists(thumb):
+                                    st.image(thumb, width=200)
+                                elif os.path.exists(offering[4]):
+                                    st.image(offering[4], width=200)
+                                else:
                                     st.info("Image not available")
+                            elif offering[0] in image_jobs:
+                                st.info("Image processing...")
                             else:
                                 st.info("No image uploaded")
                         
@@ -410,27 +408,39 @@ class JazzWoodwindsLessons:
                     key="booking_day_filter"
                 )
 
-            # Add export functionality
-            if bookings:
-                df = pd.DataFrame(bookings, columns=[
-                    'ID', 
-                    'Lesson Type', 
-                    'Student Name', 
-                    'Email', 
-                    'Day', 
-                    'Time', 
-                    'Musical Goals',
-                    'Status',
-                    'Admin Notes'
-                ])
-                csv = df.to_csv(index=False)
+            # Add export functionality; the file is only generated when the
+            # button is clicked, streaming rows from the database in chunks
+            with st.expander("📥 Export Bookings"):
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    export_start = st.date_input("From", value=None, key="export_start")
+                with col2:
+                    export_end = st.date_input("To", value=None, key="export_end")
+                with col3:
+                    export_format = st.radio("Format", list(lesson_export.EXPORT_FORMATS),
+                        horizontal=True, key="export_format")
+                _, extension, mime = lesson_export.EXPORT_FORMATS[export_format]
                 st.download_button(
-                    label="📥 Export Bookings to CSV",
-                    data=csv,
-                    file_name=f"bookings_export_{date.today()}.csv",
-                    mime="text/csv",
+                    label=f"📥 Export Bookings to {export_format}",
+                    data=lambda: lesson_export.export_bookings(export_format, export_start, export_end),
+                    file_name=f"bookings_export_{date.today()}.{extension}",
+                    mime=mime,
                 )
 
+            # One feed for every confirmed or completed lesson, built only
+            # when the button is clicked; only changed bookings are
+            # re-rendered between builds
+            st.download_button(
+                label=f"📅 Download Calendar ({lesson_calendar.feed.count()} lessons)",
+                data=lesson_calendar.feed.build,
+                file_name="lessons.ics",
+                mime="text/calendar",
+            )
+            if lesson_gcal.sync.last_sync:
+                failed = len(lesson_gcal.sync.errors)
+                st.caption(f"Google Calendar synced at {lesson_gcal.sync.last_sync:%H:%M}"
+                           + (f"; {failed} bookings failed and will be retried" if failed else ""))
+
             if bookings:
                 # Group bookings by day for better organization
                 st.markdown("### 📅 Upcoming Lessons")
@@ -438,12 +448,15 @@ class JazzWoodwindsLessons:
                     day_bookings = [b for b in bookings if b[4] == day]
                     if day_bookings and (filter_day == "All Days" or filter_day == day):
                         with st.expander(f"{day} Lessons ({len(day_bookings)})", expanded=True):
-                            for booking in sorted(day_bookings, key=lambda x: x[5]):  # Sort by time
+                            for booking in day_bookings:  # Already ordered by start time
                                 with st.container():
                                     col1, col2, col3 = st.columns([2, 2, 1])
                                     
                                     with col1:
-                                        st.markdown(f"**🕒 {booking[5]}**")
+                                        if booking[9]:
+                                            st.markdown(f"**🕒 {booking[5]}** ({datetime.fromisoformat(booking[9]).strftime('%b %d')})")
+                                        else:
+                                            st.markdown(f"**🕒 {booking[5]}**")
                                         st.markdown(f"**Student:** {booking[2]}")
                                         st.markdown(f"**Email:** {booking[3]}")
                                     
@@ -472,20 +485,11 @@ class JazzWoodwindsLessons:
                                             """, (status, booking[0]))
                                             conn.commit()
                                             conn.close()
+                                            # Cancelling frees the slot, re-activating takes it again
+                                            lesson_schedule.availability.invalidate()
+                                            lesson_gcal.request_sync()
                                         
                                         # Add quick actions
-                                        if st.button("⏰ Set Reminder", key=f"remind_{booking[0]}"):
-                                            if self.set_reminder(
-                                                booking_id=booking[0],
-                                                student_name=booking[2],
-                                                lesson_type=booking[1],
-                                                day=booking[4],
-                                                time=booking[5]
-                                            ):
-                                                st.success(f"Reminder set for {booking[2]}'s lesson on {booking[4]} at {booking[5]}")
-                                            else:
-                                                st.info("Reminder already set for this lesson")
-                                        
                                         if st.button("🗑️ Cancel Booking", key=f"cancel_{booking[0]}"):
                                             if st.warning("Are you sure you want to cancel this booking?"):
                                                 conn = sqlite3.connect('jazz_woodwinds.db')
@@ -493,6 +497,8 @@ class JazzWoodwindsLessons:
                                                 c.execute("DELETE FROM lesson_bookings WHERE id = ?", (booking[0],))
                                                 conn.commit()
                                                 conn.close()
+                                                lesson_schedule.availability.invalidate()
+                                                lesson_gcal.request_sync()
                                                 st.success("Booking cancelled successfully!")
                                                 st.rerun()
                                     
@@ -520,117 +526,67 @@ class JazzWoodwindsLessons:
             else:
                 st.info("No bookings received yet.")
 
-            if 'reminders' in st.session_state and st.session_state.reminders:
-                st.markdown("### ⏰ Active Reminders")
-                for reminder_key, reminder in st.session_state.reminders.items():
-                    with st.expander(f"{reminder['student_name']} - {reminder['day']} at {reminder['time']}"):
-                        st.markdown(f"**Lesson:** {reminder['lesson_type']}")
-                        if st.button("Clear Reminder", key=f"clear_{reminder_key}"):
-                            del st.session_state.reminders[reminder_key]
-                            st.rerun()
-
-    def set_reminder(self, booking_id, student_name, lesson_type, day, time):
-        """Generate calendar event file"""
-        if 'reminders' not in st.session_state:
-            st.session_state.reminders = {}
-        
-        reminder_key = f"reminder_{booking_id}"
-        if reminder_key not in st.session_state.reminders:
-            # Convert day and time to datetime
-            days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-            current_time = datetime.now()
-            target_day = days.index(day)
-            days_ahead = (target_day - current_time.weekday() + 7) % 7
-            
-            lesson_time = datetime.strptime(time, "%I:%M %p").time()
-            lesson_datetime = datetime.combine(
-                current_time.date() + timedelta(days=days_ahead),
-                lesson_time
-            )
-            
-            # Create ICS content
-            ics_content = f"""BEGIN:VCALENDAR
-VERSION:2.0
-BEGIN:VEVENT
-DTSTART:{lesson_datetime.strftime("%Y%m%dT%H%M%S")}
-DTEND:{(lesson_datetime + timedelta(hours=1)).strftime("%Y%m%dT%H%M%S")}
-SUMMARY:Lesson with {student_name}
-DESCRIPTION:Type: {lesson_type}
-END:VEVENT
-END:VCALENDAR"""
-            
-            # Store in session state
-            st.session_state.reminders[reminder_key] = {
-                'student_name': student_name,
-                'lesson_type': lesson_type,
-                'day': day,
-                'time': time,
-                'ics_content': ics_content,
-                'is_set': True
-            }
-            
-            # Offer both Google Calendar and ICS download
-            col1, col2 = st.columns(2)
-            with col1:
-                # Google Calendar link
-                calendar_url = (
-                    f"https://calendar.google.com/calendar/render?"
-                    f"action=TEMPLATE"
-                    f"&text={urllib.parse.quote(f'Lesson with {student_name}')}"
-                    f"&details={urllib.parse.quote(f'Type: {lesson_type}')}"
-                    f"&dates={lesson_datetime.strftime('%Y%m%dT%H%M%S')}/{(lesson_datetime + timedelta(hours=1)).strftime('%Y%m%dT%H%M%S')}"
-                )
-                st.markdown(f"[Add to Google Calendar]({calendar_url})")
-            
-            with col2:
-                # ICS download
-                st.download_button(
-                    label="Download Calendar Event",
-                    data=ics_content,
-                    file_name=f"lesson_{student_name}_{day}.ics",
-                    mime="text/calendar"
-                )
-            
-            st.success("✅ Reminder created!")
-            return True
-        return False
+        with tab3:
+            self.render_analytics()
 
-    def get_calendar_service(self):
-        """Get or create Google Calendar service"""
-        SCOPES = ['https://www.googleapis.com/auth/calendar']
-        
-        creds = None
-        if 'token.json' in os.listdir():
-            creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-        
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    'credentials.json', SCOPES)
-                creds = flow.run_local_server(port=0)
-                
-            # Save the credentials
-            with open('token.json', 'w') as token:
-                token.write(creds.to_json())
-        
-        return build('calendar', 'v3', credentials=creds)
+    @st.fragment
+    def render_analytics(self):
+        """Demand heatmap, conversion funnel and weekly trend"""
+        # pandas is only loaded once someone opens the admin panel
+        import altair as alt
+        import lesson_analytics
 
-    def check_reminders(self):
-        """Check for due reminders"""
-        if 'reminders' in st.session_state:
-            current_time = datetime.now()
-            reminders_to_remove = []
-            
-            for reminder_key, reminder in st.session_state.reminders.items():
-                if current_time >= reminder['reminder_datetime']:
-                    st.warning(f"🔔 **REMINDER:** Lesson with {reminder['student_name']} ({reminder['lesson_type']}) is scheduled for {reminder['time']} today!")
-                    reminders_to_remove.append(reminder_key)
-            
-            # Remove triggered reminders
-            for key in reminders_to_remove:
-                del st.session_state.reminders[key]
+        frame = lesson_analytics.stats.frame()
+        if frame.empty:
+            st.info("No bookings to analyse yet.")
+            return
+        summary = lesson_analytics.stats.summary()
+
+        st.subheader("When Students Want Lessons")
+        lessons = ["All Lessons"] + sorted(frame['lesson'].cat.categories)
+        lesson = st.selectbox("Lesson type", lessons, key="analytics_lesson")
+        if lesson == "All Lessons":
+            heatmap = summary['heatmap']
+        else:
+            heatmap = lesson_analytics.demand_heatmap(frame[frame['lesson'] == lesson])
+        st.altair_chart(
+            alt.Chart(heatmap).mark_rect().encode(
+                x=alt.X('hour:O', title='Start time'),
+                y=alt.Y('day:O', sort=lesson_schedule.DAYS, title=None),
+                color=alt.Color('bookings:Q', title='Bookings', scale=alt.Scale(scheme='blues')),
+                tooltip=['day', 'hour', 'bookings'],
+            ),
+            width="stretch",
+        )
+
+        st.subheader("Conversion by Lesson Type")
+        st.dataframe(
+            summary['conversion'],
+            column_config={
+                'Confirm rate': st.column_config.NumberColumn(format="percent"),
+                'Completion rate': st.column_config.NumberColumn(format="percent"),
+            },
+            width="stretch",
+        )
+
+        st.subheader("Weekly Trend")
+        st.line_chart(summary['weekly'])
+
+    @st.fragment(run_every="1s")
+    def render_image_progress(self):
+        """Show progress of background image processing"""
+        jobs = lesson_images.pending_jobs()
+        if not jobs:
+            # Everything finished; rerun the whole page to show the new images
+            st.rerun()
+        for offering_id, job in jobs.items():
+            if job['error']:
+                st.error(f"❌ Image processing failed for lesson #{offering_id}: {job['error']}")
+                if st.button("Dismiss", key=f"dismiss_image_{offering_id}"):
+                    lesson_images.clear_job(offering_id)
+                    st.rerun()
+            else:
+                st.progress(job['progress'], text=f"Processing image for lesson #{offering_id}...")
 
     def main(self):
         st.sidebar.title("Navigation")
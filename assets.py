@@ -0,0 +1,136 @@
+# assets.py
+import gzip
+import hashlib
+import json
+import os
+import re
+import click
+from flask import Blueprint, current_app, request, send_from_directory, url_for
+from flask.cli import with_appcontext
+
+bp = Blueprint('assets', __name__)
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+ASSET_EXTENSIONS = ('.css', '.js')
+# Directories under static/ holding user content rather than site assets
+SKIP_DIRS = {DIST_DIR, 'uploads', 'profile_pics', 'thumbnails'}
+MIMETYPES = {'.css': 'text/css', '.js': 'text/javascript'}
+# Served in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+ONE_YEAR = 365 * 24 * 3600
+
+
+def minify_css(source):
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    source = re.sub(r':\s+', ':', source)
+    source = source.replace(';}', '}')
+    return source.strip()
+
+
+def minify_js(source):
+    # Deliberately conservative: drop blank lines, whole-line comments and
+    # indentation, but never touch code that could contain strings or regexes
+    source = re.sub(r'^\s*/\*.*?\*/\s*$', '', source, flags=re.S | re.M)
+    lines = (line.strip() for line in source.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def _source_files(static_folder):
+    for root, dirs, files in os.walk(static_folder):
+        if root == static_folder:
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in files:
+            if name.endswith(ASSET_EXTENSIONS) and '.min.' not in name:
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, static_folder).replace(os.sep, '/'), path
+
+
+def build_assets(static_folder):
+    """Minify, fingerprint and precompress static assets into static/dist"""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    dist = os.path.join(static_folder, DIST_DIR)
+    os.makedirs(dist, exist_ok=True)
+    manifest = {}
+    for logical, path in sorted(_source_files(static_folder)):
+        stem, ext = os.path.splitext(logical)
+        with open(path, encoding='utf-8') as f:
+            data = MINIFIERS[ext](f.read()).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        hashed = f"{stem}.{digest}{ext}"
+        out_path = os.path.join(dist, hashed)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with open(out_path, 'wb') as f:
+            f.write(data)
+        # mtime=0 keeps the .gz output identical between builds
+        with open(out_path + '.gz', 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli:
+            with open(out_path + '.br', 'wb') as f:
+                f.write(brotli.compress(data, quality=11))
+        manifest[logical] = hashed
+
+    with open(os.path.join(dist, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder):
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def init_assets(app):
+    app.extensions['asset_manifest'] = load_manifest(app.static_folder)
+    app.jinja_env.globals['asset_url'] = asset_url
+    app.cli.add_command(build_assets_command)
+
+
+def asset_url(filename):
+    """Drop-in for url_for('static', filename=...) that prefers built assets"""
+    hashed = current_app.extensions.get('asset_manifest', {}).get(filename)
+    if hashed:
+        return url_for('assets.asset', filename=hashed)
+    return url_for('static', filename=filename)
+
+
+@bp.route('/assets/<path:filename>')
+def asset(filename):
+    dist = os.path.join(current_app.static_folder, DIST_DIR)
+    _, ext = os.path.splitext(filename)
+    accepted = request.accept_encodings
+    served, encoding = filename, None
+    for name, suffix in ENCODINGS:
+        if accepted[name] and os.path.exists(os.path.join(dist, filename + suffix)):
+            served, encoding = filename + suffix, name
+            break
+
+    response = send_from_directory(dist, served, mimetype=MIMETYPES.get(ext), max_age=ONE_YEAR)
+    # The file name changes whenever its content does
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.content_encoding = encoding
+    return response
+
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    """Minify, fingerprint and precompress CSS/JS into static/dist."""
+    manifest = build_assets(current_app.static_folder)
+    for logical, hashed in manifest.items():
+        click.echo(f"{logical} -> {DIST_DIR}/{hashed}")
@@ -0,0 +1,240 @@
+# async_app.py
+"""ASGI service for the I/O-bound payment and media routes.
+
+Checkout creation, payment verification and the Stripe webhook await
+Stripe over async HTTP, and video downloads are streamed without tying up
+a thread, so thousands of open checkouts and viewers share one event loop.
+Database work still runs the app's own sync code, on a thread pool.
+
+Every other route falls through to the regular Flask app, so this can
+serve the whole site:
+
+    uvicorn --factory async_app:create_async_app --workers 2
+
+or only the routes below, behind a proxy that sends everything else to the
+usual WSGI server:
+
+    POST /purchase/<id>, /payment_success/<id>, /stripe_webhook, /uploads/<file>
+
+Background jobs are left to the WSGI app (or to the flask CLI commands).
+"""
+import os
+import anyio
+from flask import request as flask_request, url_for
+from starlette.applications import Starlette
+from starlette.responses import FileResponse, JSONResponse, PlainTextResponse, RedirectResponse
+from starlette.routing import Mount, Route
+
+from app import create_app
+from extensions import db
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:
+    # Deprecated in Starlette, but enough for the pages this falls back to
+    from starlette.middleware.wsgi import WSGIMiddleware
+
+
+class FlaskSession:
+    """Opens and saves sessions through the Flask app's session interface,
+    so login and flashed messages carry over between the two apps whether
+    sessions live in the cookie or in a server-side store"""
+
+    def __init__(self, flask_app):
+        self.app = flask_app
+
+    def load(self, request):
+        with self.app.test_request_context(headers={'Cookie': request.headers.get('cookie', '')}):
+            return self.app.session_interface.open_session(self.app, flask_request)
+
+    def save(self, response, session):
+        flask_response = self.app.response_class()
+        with self.app.test_request_context():
+            self.app.session_interface.save_session(self.app, session, flask_response)
+        for value in flask_response.headers.getlist('Set-Cookie'):
+            response.headers.append('set-cookie', value)
+
+    def flash(self, response, session, message, category='message'):
+        session.setdefault('_flashes', []).append((category, message))
+        session.modified = True
+        self.save(response, session)
+
+
+def create_async_app(config='config.Config'):
+    flask_app = create_app(config, workers=False)
+    cookies = FlaskSession(flask_app)
+    stripe_client = None
+
+    def get_stripe_client():
+        # One async HTTP client per process, created on first use
+        nonlocal stripe_client
+        if stripe_client is None:
+            import stripe
+            stripe_client = stripe.StripeClient(flask_app.config['STRIPE_SECRET_KEY'],
+                                                http_client=stripe.HTTPXClient())
+        return stripe_client
+
+    def in_app(func, *args):
+        """Run sync app code on a worker thread inside an app context"""
+        def run():
+            with flask_app.app_context():
+                try:
+                    return func(*args)
+                finally:
+                    db.session.remove()
+        return anyio.to_thread.run_sync(run)
+
+    def app_url(request, endpoint, **values):
+        with flask_app.test_request_context(base_url=str(request.base_url)):
+            return url_for(endpoint, **values)
+
+    async def redirect(request, endpoint, session=None, message=None, category='message', **values):
+        response = RedirectResponse(app_url(request, endpoint, **values), status_code=302)
+        if message:
+            # Session stores may do I/O
+            await in_app(cookies.flash, response, session, message, category)
+        return response
+
+    def login_redirect(request):
+        return RedirectResponse(app_url(request, 'auth.login', next=request.url.path), status_code=302)
+
+    async def current_user_id(session):
+        from models import User
+        user_id = session.get('_user_id')
+        if user_id is None:
+            return None
+
+        def lookup():
+            user = db.session.get(User, int(user_id))
+            return user.id if user else None
+
+        return await in_app(lookup)
+
+    async def purchase_video(request):
+        from models import Video
+        from payments import checkout_params
+        from utils import has_purchased
+
+        session = await in_app(cookies.load, request)
+        user_id = await current_user_id(session)
+        if user_id is None:
+            return login_redirect(request)
+        video_id = request.path_params['video_id']
+
+        def prepare():
+            from models import User
+            video = Video.active().filter(Video.id == video_id).first()
+            if video is None or has_purchased(user_id, video_id):
+                return video, None
+            with flask_app.test_request_context(base_url=str(request.base_url)):
+                return video, checkout_params(video, db.session.get(User, user_id).email)
+
+        video, params = await in_app(prepare)
+        if video is None:
+            return PlainTextResponse('Not Found', status_code=404)
+        if params is None:
+            return await redirect(request, 'catalog.video_detail', session,
+                                  'You have already purchased this video.', 'info', video_id=video_id)
+        try:
+            checkout_session = await get_stripe_client().v1.checkout.sessions.create_async(params)
+        except Exception:
+            flask_app.logger.exception('Checkout session creation failed')
+            return await redirect(request, 'catalog.video_detail', session,
+                                  'An error occurred while processing your payment.', 'danger',
+                                  video_id=video_id)
+        return RedirectResponse(checkout_session.url, status_code=303)
+
+    async def payment_success(request):
+        from models import Video
+        from payments import amount_paid
+        from routing import stick_to_primary
+        from sales import record_purchase
+        from utils import has_purchased
+
+        session = await in_app(cookies.load, request)
+        user_id = await current_user_id(session)
+        if user_id is None:
+            return login_redirect(request)
+        video_id = request.path_params['video_id']
+        session_id = request.query_params.get('session_id')
+        if not session_id:
+            return PlainTextResponse('Bad Request', status_code=400)
+
+        try:
+            checkout_session = await get_stripe_client().v1.checkout.sessions.retrieve_async(session_id)
+            if checkout_session.payment_status != 'paid':
+                return await redirect(request, 'catalog.video_detail', session,
+                                      'Payment was not successful.', 'danger', video_id=video_id)
+
+            def record():
+                if not has_purchased(user_id, video_id):
+                    video = db.session.get(Video, video_id)
+                    if video is not None:
+                        record_purchase(user_id, video, amount_paid(checkout_session))
+
+            await in_app(record)
+            # The video page it redirects to must see the purchase
+            stick_to_primary(session, flask_app)
+        except Exception:
+            flask_app.logger.exception('Payment verification failed')
+            return await redirect(request, 'catalog.video_detail', session,
+                                  'An error occurred while verifying your payment.', 'danger',
+                                  video_id=video_id)
+        return await redirect(request, 'catalog.video_detail', session,
+                              'Payment successful! You now have access to this video.', 'success',
+                              video_id=video_id)
+
+    async def stripe_webhook(request):
+        import stripe
+        from payments import handle_checkout_session
+
+        payload = (await request.body()).decode('utf-8')
+        try:
+            event = stripe.Webhook.construct_event(
+                payload, request.headers.get('Stripe-Signature'),
+                flask_app.config['STRIPE_WEBHOOK_SECRET'])
+        except ValueError:
+            return PlainTextResponse('Invalid payload', status_code=400)
+        except stripe.error.SignatureVerificationError:
+            return PlainTextResponse('Invalid signature', status_code=400)
+
+        if event['type'] == 'checkout.session.completed':
+            await in_app(handle_checkout_session, event['data']['object'])
+        return JSONResponse({'success': True})
+
+    async def uploaded_file(request):
+        from storage import media_url
+        from utils import can_watch
+
+        filename = request.path_params['filename']
+        if os.path.basename(filename) != filename or filename.startswith('.'):
+            return PlainTextResponse('Not Found', status_code=404)
+        session = await in_app(cookies.load, request)
+        user_id = await current_user_id(session)
+        if user_id is None:
+            return login_redirect(request)
+        if not await in_app(can_watch, user_id, filename):
+            return PlainTextResponse('Forbidden', status_code=403)
+        # Remote backends serve the bytes themselves
+        url = await in_app(media_url, filename)
+        if url:
+            return RedirectResponse(url, status_code=302)
+        path = os.path.join(flask_app.config['UPLOAD_FOLDER'], filename)
+        if not os.path.isfile(path):
+            return PlainTextResponse('Not Found', status_code=404)
+        # Streams in chunks and answers Range requests for seeking
+        return FileResponse(path)
+
+    return Starlette(routes=[
+        Route('/purchase/{video_id:int}', purchase_video, methods=['POST']),
+        Route('/payment_success/{video_id:int}', payment_success),
+        Route('/stripe_webhook', stripe_webhook, methods=['POST']),
+        Route('/uploads/{filename}', uploaded_file),
+        # Everything else, including GET /purchase/<id>, is the Flask app
+        Mount('/', WSGIMiddleware(flask_app)),
+    ])
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run('async_app:create_async_app', factory=True, port=5001)
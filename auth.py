@@ -0,0 +1,113 @@
+# auth.py
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask_login import login_user, current_user, logout_user, login_required
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import User, Video
+from forms import RegistrationForm, LoginForm, UpdateAccountForm
+from utils import save_picture
+from passwords import HashPoolBusy, get_hasher, login_allowed
+from availability import get_availability
+
+bp = Blueprint('auth', __name__)
+
+@bp.route("/register", methods=['GET', 'POST'])
+def register():
+    if current_user.is_authenticated:
+        return redirect(url_for('catalog.home'))
+    form = RegistrationForm()
+    if form.validate_on_submit():
+        try:
+            hashed_pw = get_hasher().hash(form.password.data)
+        except HashPoolBusy:
+            flash('The server is busy. Please try again in a moment.', 'danger')
+            return render_template('register.html', title='Register', form=form), 503
+        user = User(username=form.username.data, email=form.email.data, password=hashed_pw)
+        db.session.add(user)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Taken since the form validated, or on a node this one hasn't heard from yet
+            db.session.rollback()
+            flash('That username or email is already registered.', 'danger')
+            return render_template('register.html', title='Register', form=form)
+        get_availability().add(user)
+        flash('Your account has been created! You can now log in.', 'success')
+        return redirect(url_for('auth.login'))
+    return render_template('register.html', title='Register', form=form)
+
+@bp.route("/api/availability")
+def availability():
+    # Live check for the registration form, e.g. ?username=alice&email=a@example.com
+    checker = get_availability()
+    return jsonify({column: checker.is_free(column, request.args[column])
+                    for column in checker.columns if request.args.get(column)})
+
+@bp.route("/login", methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('catalog.home'))
+    form = LoginForm()
+    if form.validate_on_submit():
+        # Throttled attempts never reach the hash pool
+        if not login_allowed(request.remote_addr, form.email.data):
+            flash('Too many login attempts. Please wait a minute and try again.', 'danger')
+            return render_template('login.html', title='Login', form=form), 429
+        hasher = get_hasher()
+        user = User.query.filter_by(email=form.email.data).first()
+        try:
+            valid = hasher.verify(user.password if user else None, form.password.data)
+        except HashPoolBusy:
+            flash('The server is busy. Please try again in a moment.', 'danger')
+            return render_template('login.html', title='Login', form=form), 503
+        if valid:
+            # Upgrade hashes made with an older method or cost
+            if hasher.needs_rehash(user.password):
+                try:
+                    user.password = hasher.hash(form.password.data)
+                    db.session.commit()
+                except HashPoolBusy:
+                    pass  # Try again on the next login
+            login_user(user)
+            next_page = request.args.get('next')
+            return redirect(next_page) if next_page else redirect(url_for('catalog.home'))
+        else:
+            flash('Login unsuccessful. Please check email and password.', 'danger')
+    return render_template('login.html', title='Login', form=form)
+
+@bp.route("/logout")
+def logout():
+    logout_user()
+    return redirect(url_for('catalog.home'))
+
+@bp.route("/account", methods=['GET', 'POST'])
+@login_required
+def account():
+    form = UpdateAccountForm()
+    if form.validate_on_submit():
+        if form.picture.data:
+            picture_file = save_picture(form.picture.data)
+            current_user.image_file = picture_file
+        current_user.username = form.username.data
+        current_user.email = form.email.data
+        current_user.bio = form.bio.data
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash('That username or email is already registered.', 'danger')
+            return redirect(url_for('auth.account'))
+        get_availability().add(current_user)
+        flash('Your account has been updated!', 'success')
+        return redirect(url_for('auth.account'))
+    elif request.method == 'GET':
+        form.username.data = current_user.username
+        form.email.data = current_user.email
+        form.bio.data = current_user.bio
+    
+    image_file = url_for('static', filename='profile_pics/' + current_user.image_file)
+    videos = Video.active().filter_by(uploader=current_user).order_by(Video.date_posted.desc()).all()
+    
+    return render_template('account.html', title='Account',
+                         image_file=image_file, form=form, videos=videos)
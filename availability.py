@@ -0,0 +1,118 @@
+# availability.py
+import hashlib
+import math
+import threading
+import time
+from flask import current_app
+
+from extensions import db
+from models import User
+
+FALSE_POSITIVE_RATE = 0.01  # Share of free names that still cost a query
+MIN_CAPACITY = 10000
+
+
+class BloomFilter:
+    """Set membership in a few bits per item, with no false negatives.
+
+    `in` is False only for items never added; True means "probably added".
+    """
+
+    def __init__(self, capacity, false_positive_rate=FALSE_POSITIVE_RATE):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class Availability:
+    """Answers "is this username or email free?" mostly from memory.
+
+    A Bloom filter per column, built from the User table, says "definitely
+    free" without a query; a possible hit falls back to the unique index.
+    Until the first build finishes every check queries. Names freed by
+    renames linger in the filter, and names taken on other nodes are missed,
+    until the next rebuild; the unique constraints stay authoritative.
+    """
+
+    columns = ('username', 'email')
+
+    def __init__(self):
+        self._filters = None
+        self._pending = None  # Names added while a rebuild is reading the table
+        self._lock = threading.Lock()
+
+    def rebuild(self):
+        with self._lock:
+            self._pending = []
+        count = db.session.query(db.func.count(User.id)).scalar()
+        # Room to grow until the next rebuild; past capacity only the
+        # false positive rate suffers
+        filters = {column: BloomFilter(max(MIN_CAPACITY, 2 * count)) for column in self.columns}
+        for username, email in db.session.query(User.username, User.email).yield_per(10000):
+            filters['username'].add(username)
+            filters['email'].add(email)
+        with self._lock:
+            for column, value in self._pending:
+                filters[column].add(value)
+            self._filters, self._pending = filters, None
+
+    def add(self, user):
+        """Record a new or changed user's names"""
+        with self._lock:
+            for column in self.columns:
+                value = getattr(user, column)
+                if self._pending is not None:
+                    self._pending.append((column, value))
+                if self._filters is not None:
+                    self._filters[column].add(value)
+
+    def is_free(self, column, value):
+        filters = self._filters
+        if filters is not None and value not in filters[column]:
+            return True
+        return not db.session.query(
+            db.session.query(User).filter(getattr(User, column) == value).exists()).scalar()
+
+
+def init_availability(app):
+    app.extensions['availability'] = Availability()
+
+
+def get_availability():
+    return current_app.extensions['availability']
+
+
+def start_availability_refresher(app):
+    """Build the filters now, then rebuild them periodically on a daemon thread"""
+    interval = app.config.get('AVAILABILITY_REFRESH_INTERVAL', 3600)
+    availability = app.extensions['availability']
+
+    def run():
+        while True:
+            with app.app_context():
+                try:
+                    availability.rebuild()
+                except Exception:
+                    app.logger.exception('Availability filter rebuild failed')
+                finally:
+                    db.session.remove()
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name='availability-refresher', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,305 @@
+# bench_load.py
+"""Load-test the marketplace under gunicorn and report latency per route.
+
+Seeds a database with synthetic users, videos, purchases, ratings and
+comments, starts gunicorn against it, and drives it with concurrent
+virtual users. Stripe webhooks are signed locally with a test secret, so
+no Stripe account or network access is needed.
+
+    python bench_load.py
+    python bench_load.py --users 2000 --videos 1000 --vus 32 --duration 60
+    python bench_load.py --database-url postgresql://localhost/bench
+    python bench_load.py --save baseline.json
+    python bench_load.py --baseline baseline.json
+"""
+import argparse
+import hashlib
+import hmac
+import http.client
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+from benchutil import add_baseline_args, compare_baseline
+from config import Config
+
+WEBHOOK_SECRET = 'whsec_bench'
+PASSWORD = 'bench-password'
+MEDIA_SIZE = 4 * 1024 * 1024
+RANGE_SIZE = 64 * 1024
+# Relative frequency of each request a virtual user makes
+WEIGHTS = {'home': 3, 'video_detail': 4, 'uploaded_file': 4, 'login': 1, 'stripe_webhook': 1}
+
+
+class LoadConfig(Config):
+    """App config for the gunicorn workers; paths come from the harness"""
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCH_DATABASE_URL') or 'sqlite:///bench.db'
+    UPLOAD_FOLDER = os.environ.get('BENCH_UPLOAD_FOLDER') or tempfile.gettempdir()
+    WTF_CSRF_ENABLED = False
+    STRIPE_SECRET_KEY = 'sk_test_bench'
+    STRIPE_WEBHOOK_SECRET = WEBHOOK_SECRET
+    STORAGE_BACKEND = 'local'
+    CDN_URL = ''
+    REAPER_INTERVAL = 0
+    RECOMMENDATION_INTERVAL = 0
+    PROBE_INTERVAL = 24 * 3600
+    # All virtual users share one address; measure logins, not the throttle
+    LOGIN_IP_LIMIT = 0
+    LOGIN_ACCOUNT_LIMIT = 0
+
+
+class _RandomFile:
+    """Readable stand-in for an uploaded video of `size` random bytes"""
+
+    def __init__(self, size, seed):
+        self.remaining = size
+        self.rng = random.Random(seed)
+
+    def read(self, n=-1):
+        n = self.remaining if n < 0 else min(n, self.remaining)
+        self.remaining -= n
+        return self.rng.randbytes(n)
+
+
+def seed(app, args, media_key):
+    """Bulk-insert synthetic rows; returns {user_id: [purchased video ids]}"""
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from extensions import db
+    from models import User, Video, Purchase, Rating, Comment
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    # One hash for everyone; hashing per row would dominate seeding time
+    password = generate_password_hash(PASSWORD)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(insert(User), [
+            {'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com', 'password': password}
+            for i in range(1, args.users + 1)])
+        db.session.execute(insert(Video), [
+            {'id': i, 'title': f'Lesson {i}', 'filename': media_key, 'price': 5 + i % 45,
+             'user_id': rng.randint(1, args.users), 'date_posted': now - timedelta(hours=i),
+             'probe_status': 'ok', 'duration': 120 + i % 3000, 'width': 1920, 'height': 1080,
+             'video_codec': 'h264', 'bitrate': 4_000_000}
+            for i in range(1, args.videos + 1)])
+
+        owned = {}
+        purchases = []
+        for user_id in range(1, args.users + 1):
+            videos = rng.sample(range(1, args.videos + 1), min(args.purchases, args.videos))
+            owned[user_id] = videos
+            purchases += [{'user_id': user_id, 'video_id': v, 'price': 5 + v % 45} for v in videos]
+        db.session.execute(insert(Purchase), purchases)
+        # One rating per user and video, as the unique index requires
+        pairs = rng.sample(range(args.videos * args.users), min(args.ratings, args.videos * args.users))
+        db.session.execute(insert(Rating), [
+            {'video_id': pair // args.users + 1, 'user_id': pair % args.users + 1,
+             'score': rng.randint(1, 5)} for pair in pairs])
+        db.session.execute(insert(Comment), [
+            {'video_id': rng.randint(1, args.videos), 'user_id': rng.randint(1, args.users),
+             'content': f'Comment {i}: great lesson, the ii-V-I section helped a lot.'}
+            for i in range(args.comments)])
+        db.session.commit()
+    return owned
+
+
+def webhook_request(rng, args):
+    """A checkout.session.completed event signed the way Stripe signs it"""
+    user_id = rng.randint(1, args.users)
+    video_id = rng.randint(1, args.videos)
+    payload = json.dumps({
+        'id': f'evt_bench_{rng.getrandbits(48):x}',
+        'object': 'event',
+        'type': 'checkout.session.completed',
+        'data': {'object': {
+            'object': 'checkout.session',
+            'customer_email': f'user{user_id}@example.com',
+            'amount_total': (5 + video_id % 45) * 100,
+            'display_items': [{'custom': {'name': f'Lesson {video_id}'}}],
+        }},
+    })
+    timestamp = int(time.time())
+    signature = hmac.new(WEBHOOK_SECRET.encode(), f'{timestamp}.{payload}'.encode(),
+                         hashlib.sha256).hexdigest()
+    return payload, {'Content-Type': 'application/json',
+                     'Stripe-Signature': f't={timestamp},v1={signature}'}
+
+
+class VirtualUser(threading.Thread):
+    """Logs in as one seeded user and makes weighted random requests"""
+
+    def __init__(self, index, host, port, args, owned, media_key, deadline, results):
+        super().__init__(daemon=True)
+        self.rng = random.Random(args.seed + index)
+        self.user_id = self.rng.randint(1, args.users)
+        self.host, self.port = host, port
+        self.args, self.owned, self.media_key = args, owned, media_key
+        self.deadline = deadline
+        self.results = results  # route -> list of (seconds, status)
+        self.cookie = None
+
+    def request(self, route, method, path, body=None, headers=None, cookie=True):
+        headers = dict(headers or {})
+        if cookie and self.cookie:
+            headers['Cookie'] = self.cookie
+        start = time.perf_counter()
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            # Reconnect and count it as a failed request
+            self.conn.close()
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            response, status = None, 599
+        self.results[route].append((time.perf_counter() - start, status))
+        if response is not None:
+            set_cookie = response.getheader('Set-Cookie')
+            if set_cookie and set_cookie.startswith('session='):
+                self.cookie = set_cookie.split(';', 1)[0]
+        return status
+
+    def login(self):
+        # Sent without the session cookie so the password is checked every time
+        body = urlencode({'email': f'user{self.user_id}@example.com', 'password': PASSWORD})
+        self.request('login', 'POST', '/login', body,
+                     {'Content-Type': 'application/x-www-form-urlencoded'}, cookie=False)
+
+    def run(self):
+        self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        self.login()
+        routes, weights = zip(*WEIGHTS.items())
+        while time.monotonic() < self.deadline:
+            route = self.rng.choices(routes, weights)[0]
+            if route == 'home':
+                self.request(route, 'GET', '/')
+            elif route == 'video_detail':
+                self.request(route, 'GET', f'/video/{self.rng.choice(self.owned[self.user_id])}')
+            elif route == 'uploaded_file':
+                offset = self.rng.randrange(0, MEDIA_SIZE - RANGE_SIZE)
+                self.request(route, 'GET', f'/uploads/{self.media_key}',
+                             headers={'Range': f'bytes={offset}-{offset + RANGE_SIZE - 1}'})
+            elif route == 'login':
+                self.login()
+            else:
+                payload, headers = webhook_request(self.rng, self.args)
+                self.request(route, 'POST', '/stripe_webhook', payload, headers, cookie=False)
+        self.conn.close()
+
+
+def start_gunicorn(args, env):
+    port = args.port
+    command = [sys.executable, '-m', 'gunicorn', '--workers', str(args.workers),
+               '--threads', str(args.threads), '--bind', f'127.0.0.1:{port}',
+               '--log-level', 'warning', "app:create_app('bench_load.LoadConfig')"]
+    server = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            sys.exit(f"gunicorn exited with status {server.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/login')
+            if conn.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    sys.exit("gunicorn did not start within 30 seconds")
+
+
+def percentiles(durations):
+    if len(durations) < 2:
+        value = durations[0] * 1000 if durations else 0.0
+        return value, value, value
+    cuts = statistics.quantiles(durations, n=100, method='inclusive')
+    return cuts[49] * 1000, cuts[94] * 1000, cuts[98] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--videos', type=int, default=300)
+    parser.add_argument('--purchases', type=int, default=5, help='videos owned per user')
+    parser.add_argument('--ratings', type=int, default=2000)
+    parser.add_argument('--comments', type=int, default=2000)
+    parser.add_argument('--database-url', help='default: a temporary SQLite file')
+    parser.add_argument('--vus', type=int, default=16, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=20, help='seconds of load')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=1)
+    add_baseline_args(parser)
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='load-bench-')
+    database_url = args.database_url or 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    upload_dir = os.path.join(workdir, 'uploads')
+    env = dict(os.environ, BENCH_DATABASE_URL=database_url, BENCH_UPLOAD_FOLDER=upload_dir)
+    LoadConfig.SQLALCHEMY_DATABASE_URI = database_url
+    LoadConfig.UPLOAD_FOLDER = upload_dir
+
+    from app import create_app
+    from storage import LocalStorage
+
+    server = None
+    try:
+        app = create_app(LoadConfig)
+        media_key = LocalStorage(upload_dir).save(
+            _RandomFile(MEDIA_SIZE, args.seed), 'lesson.mp4')
+        start = time.perf_counter()
+        owned = seed(app, args, media_key)
+        print(f"seeded {args.users} users, {args.videos} videos, {args.ratings} ratings, "
+              f"{args.comments} comments in {time.perf_counter() - start:.1f} s")
+
+        server = start_gunicorn(args, env)
+        results = {route: [] for route in WEIGHTS}
+        deadline = time.monotonic() + args.duration
+        vus = [VirtualUser(i, '127.0.0.1', args.port, args, owned, media_key, deadline, results)
+               for i in range(args.vus)]
+        for vu in vus:
+            vu.start()
+        for vu in vus:
+            vu.join()
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {}
+    total = sum(len(samples) for samples in results.values())
+    print(f"{total} requests in {args.duration:.0f} s with {args.vus} virtual users "
+          f"({total / args.duration:.0f} req/s)")
+    print(f"{'route':16} {'requests':>9} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    failed = False
+    for route, samples in results.items():
+        durations = [seconds for seconds, _ in samples]
+        errors = sum(1 for _, status in samples if status >= 400)
+        p50, p95, p99 = percentiles(durations)
+        result[route] = {'requests': len(samples), 'errors': errors,
+                         'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99}
+        print(f"{route:16} {len(samples):9d} {errors:7d} {p50:8.1f} {p95:8.1f} {p99:8.1f}")
+        if samples and errors / len(samples) > args.max_error_rate:
+            print(f"{route}: error rate {errors / len(samples):.1%} (FAILED)")
+            failed = True
+
+    compare_baseline(result, ('p95_ms', 'p99_ms'), args, failed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+# bench_login.py
+"""Benchmark login latency for real users during a bad-password flood.
+
+Starts the app on a threaded local server. Attacker threads post wrong
+passwords for real accounts from a handful of addresses as fast as they
+can, while legitimate users log in at a normal pace from their own
+addresses. Reports the legitimate users' login latency and what happened
+to the attack traffic. Run with --hash-workers 0 --no-limits to see the
+old behaviour of hashing on the request thread without throttling.
+
+    python bench_login.py
+    python bench_login.py --attackers 64 --duration 60
+    python bench_login.py --hash-workers 0 --no-limits
+    python bench_login.py --save baseline.json
+    python bench_login.py --baseline baseline.json
+"""
+import argparse
+import http.client
+import logging
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.serving import make_server
+
+from app import create_app
+from bench_load import percentiles
+from benchutil import add_baseline_args, compare_baseline
+
+PASSWORD = 'correct horse battery staple'
+
+
+def make_config(workdir, args):
+    class BenchConfig:
+        SECRET_KEY = 'bench'
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+        UPLOAD_FOLDER = os.path.join(workdir, 'uploads')
+        ALLOWED_EXTENSIONS = {'mp4'}
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        PASSWORD_HASH_METHOD = args.method
+        PASSWORD_HASH_WORKERS = args.hash_workers
+        PASSWORD_HASH_QUEUE = args.hash_queue
+        LOGIN_IP_LIMIT = 0 if args.no_limits else 10
+        LOGIN_ACCOUNT_LIMIT = 0 if args.no_limits else 5
+    return BenchConfig
+
+
+def seed(app, accounts):
+    from sqlalchemy import insert
+    from extensions import db
+    from models import User
+    from passwords import get_hasher
+
+    with app.app_context():
+        db.create_all()
+        password = get_hasher().hash(PASSWORD)
+        db.session.execute(insert(User), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'password': password}
+            for i in range(accounts)])
+        db.session.commit()
+
+
+def post_login(port, email, password, address):
+    """POST /login from `address`; returns (seconds, status)"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    start = time.perf_counter()
+    try:
+        conn.request('POST', '/login', urlencode({'email': email, 'password': password}),
+                     {'Content-Type': 'application/x-www-form-urlencoded',
+                      'X-Forwarded-For': address})
+        response = conn.getresponse()
+        response.read()
+        status = response.status
+    except (OSError, http.client.HTTPException):
+        status = 599
+    finally:
+        conn.close()
+    return time.perf_counter() - start, status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--attackers', type=int, default=32, help='concurrent attack threads')
+    parser.add_argument('--attack-ips', type=int, default=4, help='addresses the attack comes from')
+    parser.add_argument('--users', type=int, default=40, help='legitimate users logging in')
+    parser.add_argument('--interval', type=float, default=12, help='seconds between a user\'s logins')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--method', default='pbkdf2:sha256:600000', help='password hash method')
+    parser.add_argument('--hash-workers', type=int, default=4, help='0 hashes on the request thread')
+    parser.add_argument('--hash-queue', type=int, default=32)
+    parser.add_argument('--no-limits', action='store_true', help='disable login throttling')
+    parser.add_argument('--port', type=int, default=8766)
+    add_baseline_args(parser)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='login-bench-')
+    try:
+        app = create_app(make_config(workdir, args))
+        seed(app, args.users)
+        # Attack and user traffic is told apart by X-Forwarded-For
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        server = make_server('127.0.0.1', args.port, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        deadline = time.monotonic() + args.duration
+        attack, legit = Counter(), []
+
+        def attacker(index):
+            rng = random.Random(index)
+            address = f'10.0.0.{index % args.attack_ips + 1}'
+            while time.monotonic() < deadline:
+                email = f'user{rng.randrange(args.users)}@example.com'
+                _, status = post_login(args.port, email, 'wrong password', address)
+                attack[status] += 1
+
+        def user(index):
+            # Spread first logins out so users don't arrive in lockstep
+            time.sleep(random.Random(index).uniform(0, args.interval))
+            while time.monotonic() < deadline:
+                legit.append(post_login(args.port, f'user{index}@example.com', PASSWORD,
+                                        f'192.168.{index // 250}.{index % 250 + 1}'))
+                time.sleep(args.interval)
+
+        threads = ([threading.Thread(target=attacker, args=(i,)) for i in range(args.attackers)]
+                   + [threading.Thread(target=user, args=(i,)) for i in range(args.users)])
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        server.shutdown()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    p50, p95, p99 = percentiles([seconds for seconds, _ in legit])
+    succeeded = sum(1 for _, status in legit if status == 302)
+    result = {'login_p50_ms': p50, 'login_p95_ms': p95, 'login_p99_ms': p99,
+              'login_success_rate': succeeded / len(legit) if legit else 0.0}
+    print(f"attack: {sum(attack.values())} attempts from {args.attack_ips} addresses "
+          f"({sum(attack.values()) / args.duration:.0f}/s); status counts "
+          + ', '.join(f"{status}: {count}" for status, count in sorted(attack.items())))
+    print(f"users: {succeeded}/{len(legit)} logins succeeded; "
+          f"p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms")
+
+    compare_baseline(result, ('login_p99_ms',), args)
+
+
+if __name__ == '__main__':
+    main()
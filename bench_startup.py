@@ -0,0 +1,79 @@
+# bench_startup.py
+"""Measure cold-start cost of a worker: importing app and calling create_app().
+
+Each run is a fresh interpreter started with ``python -X importtime``, the
+same work a gunicorn worker does after fork with preload disabled.
+
+    python bench_startup.py                      # report
+    python bench_startup.py --save baseline.json # record a baseline
+    python bench_startup.py --baseline baseline.json  # fail on regression
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from benchutil import add_baseline_args, compare_baseline
+
+BASEDIR = os.path.abspath(os.path.dirname(__file__))
+SNIPPET = (
+    "import time; t = time.perf_counter(); "
+    "import app; app.create_app(); "
+    "print((time.perf_counter() - t) * 1e6)"
+)
+# Modules that should only be imported when a request actually needs them
+LAZY_MODULES = ('stripe', 'PIL')
+
+
+def run_once():
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', SNIPPET],
+        cwd=BASEDIR, capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        # One space follows the bar; any more mark a nested import
+        modules[name[1:]] = int(cumulative_us)
+    top_level = {name: us for name, us in modules.items() if not name.startswith(' ')}
+    return {
+        'wall_us': float(proc.stdout.strip().splitlines()[-1]),
+        'import_us': sum(top_level.values()),
+        'top_level': top_level,
+        'lazy_loaded': sorted(m for m in LAZY_MODULES if any(n.strip() == m for n in modules)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='slowest top-level imports to show')
+    add_baseline_args(parser)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    result = {
+        'wall_ms': statistics.median(r['wall_us'] for r in runs) / 1000,
+        'import_ms': statistics.median(r['import_us'] for r in runs) / 1000,
+    }
+    slowest = sorted(runs[-1]['top_level'].items(), key=lambda item: item[1], reverse=True)
+
+    print(f"create_app() cold start: {result['wall_ms']:.1f} ms (median of {args.runs})")
+    print(f"import time:             {result['import_ms']:.1f} ms")
+    for name, us in slowest[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    eager = runs[-1]['lazy_loaded']
+    if eager:
+        print(f"FAIL: imported at startup but should be lazy: {', '.join(eager)}")
+        failed = True
+
+    compare_baseline(result, ('wall_ms', 'import_ms'), args, failed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+# bench_streamlit.py
+"""Benchmark reruns of the Streamlit lessons app with AppTest.
+
+Seeds a fresh jazz_woodwinds.db in a temporary directory with synthetic
+offerings and bookings, then drives appp.py headlessly through the Home
+page, the Admin Panel and the common interactions: submitting a booking,
+changing a booking's status and editing its notes. For each scenario it
+reports the median rerun time, the SQL statements executed (every sqlite3
+connection is traced) and the number of elements rendered.
+
+    python bench_streamlit.py
+    python bench_streamlit.py --offerings 50 --bookings 2000 --runs 10
+    python bench_streamlit.py --save baseline.json
+    python bench_streamlit.py --baseline baseline.json
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from streamlit.testing.v1 import AppTest
+
+from benchutil import add_baseline_args, compare_baseline
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'appp.py')
+ADMIN_PASSWORD = 'onionburger36'
+STATUSES = ['Pending', 'Confirmed', 'Completed', 'Cancelled']
+
+
+class StatementCounter:
+    """Counts SQL statements on every sqlite3 connection opened while installed"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._connect = sqlite3.connect
+
+    def _trace(self, statement):
+        with self._lock:
+            self.count += 1
+
+    def install(self):
+        def connect(*args, **kwargs):
+            conn = self._connect(*args, **kwargs)
+            conn.set_trace_callback(self._trace)
+            return conn
+        sqlite3.connect = connect
+
+    def uninstall(self):
+        sqlite3.connect = self._connect
+
+
+def seed(offerings, bookings):
+    import lesson_db
+    from lesson_schedule import DAYS, format_time
+
+    lesson_db.migrate()
+    rng = random.Random(0)
+    conn = sqlite3.connect(lesson_db.DB_PATH)
+    conn.executemany("""
+        INSERT INTO lesson_offerings (name, description, price, duration_minutes)
+        VALUES (?, ?, ?, 60)
+    """, [(f'Lesson {i}', f'Jazz improvisation, level {i % 5 + 1}', f'${40 + i % 5 * 10}/hour')
+          for i in range(offerings)])
+    # Past lessons plus a few in the coming weeks, on the hour, never overlapping
+    first = datetime.combine(date.today(), datetime.min.time()) - timedelta(days=2 * 365)
+    starts = sorted(rng.sample(range(0, (2 * 365 + 14) * 24), bookings))
+    rows = []
+    for i, hour in enumerate(starts):
+        starts_at = first + timedelta(hours=hour)
+        rows.append((rng.randrange(offerings) + 1, f'Student {i}', f'student{i}@example.com',
+                     DAYS[starts_at.weekday()], format_time(starts_at.time()), 'Play bebop heads',
+                     rng.choice(STATUSES), starts_at.isoformat(),
+                     (starts_at + timedelta(hours=1)).isoformat()))
+    conn.executemany("""
+        INSERT INTO lesson_bookings
+        (lesson_id, student_name, student_email, preferred_day, preferred_time, musical_goals,
+         status, starts_at, ends_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+
+
+def count_elements(node):
+    children = getattr(node, 'children', None)
+    if children is None:
+        return 1
+    return sum(count_elements(child) for child in children.values())
+
+
+def labelled(widgets, label):
+    return next(widget for widget in widgets if widget.label == label)
+
+
+def home(timeout):
+    return AppTest.from_file(APP_PATH, default_timeout=timeout).run()
+
+
+def admin(timeout):
+    at = home(timeout)
+    at.sidebar.radio[0].set_value('Admin Panel').run()
+    at.sidebar.text_input[0].input(ADMIN_PASSWORD)
+    at.sidebar.button[0].click().run()
+    return at
+
+
+def first_booking_id():
+    conn = sqlite3.connect('jazz_woodwinds.db')
+    try:
+        return conn.execute("SELECT MIN(id) FROM lesson_bookings").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def scenarios(timeout):
+    """(name, setup, action) triples; `action(at, i)` performs one rerun"""
+    booking_id = first_booking_id()
+
+    def submit_booking(at, i):
+        # The form closes after a booking, so each round opens it again
+        labelled(at.button, 'Book This Lesson').click().run()
+        labelled(at.text_input, 'Student Name').input(f'Bench Student {i}')
+        labelled(at.text_input, 'Student Email').input(f'bench{i}@example.com')
+        labelled(at.text_area, 'What are your musical goals?').input('Learn to swing')
+        labelled(at.button, 'Submit Booking').click().run()
+
+    def change_status(at, i):
+        at.selectbox(key=f'status_{booking_id}').set_value(STATUSES[i % 2]).run()
+
+    def edit_notes(at, i):
+        at.text_area(key=f'notes_{booking_id}').input(f'Bench note {i}').run()
+
+    return [
+        ('home', home, lambda at, i: at.run()),
+        ('booking_submit', home, submit_booking),
+        ('admin', admin, lambda at, i: at.run()),
+        ('status_change', admin, change_status),
+        ('notes_edit', admin, edit_notes),
+    ]
+
+
+def measure(setup, action, runs, timeout, counter):
+    """Median seconds, SQL statements and elements for one rerun of `action`"""
+    at = setup(timeout)
+    action(at, 0)  # Warm-up: first-run imports and caches
+    durations, statements = [], []
+    for i in range(1, runs + 1):
+        before = counter.count
+        start = time.perf_counter()
+        action(at, i)
+        durations.append(time.perf_counter() - start)
+        statements.append(counter.count - before)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    return statistics.median(durations), statistics.median(statements), count_elements(at._tree)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--offerings', type=int, default=12)
+    parser.add_argument('--bookings', type=int, default=500)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=60, help='seconds allowed per rerun')
+    add_baseline_args(parser)
+    args = parser.parse_args()
+
+    # The app and its modules use relative paths for the database and images
+    sys.path.insert(0, os.path.dirname(APP_PATH))
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix='streamlit-bench-')
+    os.chdir(workdir)
+    counter = StatementCounter()
+    result = {}
+    try:
+        seed(args.offerings, args.bookings)
+        counter.install()
+        for name, setup, action in scenarios(args.timeout):
+            seconds, statements, elements = measure(setup, action, args.runs, args.timeout, counter)
+            result[name] = {'rerun_ms': seconds * 1000, 'sql_statements': statements,
+                            'elements': elements}
+    finally:
+        counter.uninstall()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.offerings} offerings, {args.bookings} bookings; median of {args.runs} reruns")
+    print(f"{'scenario':16} {'rerun ms':>9} {'SQL':>6} {'elements':>9}")
+    for name, metrics in result.items():
+        print(f"{name:16} {metrics['rerun_ms']:9.1f} {metrics['sql_statements']:6.0f} "
+              f"{metrics['elements']:9d}")
+
+    # Counts are deterministic, so any increase is a regression
+    compare_baseline(result, ('rerun_ms', 'sql_statements', 'elements'), args,
+                     exact=('sql_statements', 'elements'))
+
+
+if __name__ == '__main__':
+    main()
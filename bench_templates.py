@@ -0,0 +1,111 @@
+# bench_templates.py
+"""Benchmark template compilation and rendering of index.html.
+
+Renders the home page against synthetic videos (10k by default) with render
+profiling on, then prints per-template and per-block timings. Compile time
+is measured with an empty and with a warm bytecode cache.
+
+    python bench_templates.py
+    python bench_templates.py --videos 50000 --runs 10
+    python bench_templates.py --save baseline.json
+    python bench_templates.py --baseline baseline.json
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from flask import render_template
+
+from app import create_app
+from benchutil import add_baseline_args, compare_baseline
+from profiling import render_stats
+
+
+def make_config(cache_dir):
+    class BenchConfig:
+        SECRET_KEY = 'bench'
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+        UPLOAD_FOLDER = tempfile.mkdtemp()
+        ALLOWED_EXTENSIONS = {'mp4'}
+        TESTING = True
+        JINJA_BYTECODE_CACHE_DIR = cache_dir
+        TEMPLATE_PROFILING = True
+    return BenchConfig
+
+
+def synthetic_videos(count):
+    uploaders = [SimpleNamespace(username=f'instructor{i}', image_file='default.jpg')
+                 for i in range(50)]
+    posted = datetime(2024, 1, 1)
+    return [
+        SimpleNamespace(
+            id=i,
+            title=f'Lesson {i}: Jazz improvisation over ii-V-I',
+            filename=f'{i:064x}.mp4',
+            price=10 + i % 90,
+            date_posted=posted - timedelta(hours=i),
+            uploader=uploaders[i % len(uploaders)],
+            average_rating=round(1 + (i % 40) / 10, 2) if i % 3 else 'No ratings yet',
+        )
+        for i in range(count)
+    ]
+
+
+def time_compile(cache_dir, templates):
+    """Seconds to load `templates` in a fresh app using `cache_dir`"""
+    app = create_app(make_config(cache_dir))
+    start = time.perf_counter()
+    for name in templates:
+        app.jinja_env.get_template(name)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--videos', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    add_baseline_args(parser)
+    args = parser.parse_args()
+
+    templates = ['index.html', 'layout.html', 'video_detail.html', 'account.html']
+    cache_dir = tempfile.mkdtemp(prefix='jinja-bench-')
+    try:
+        cold = time_compile(cache_dir, templates)
+        warm = time_compile(cache_dir, templates)
+
+        app = create_app(make_config(cache_dir))
+        videos = synthetic_videos(args.videos)
+        durations = []
+        with app.test_request_context('/'):
+            render_template('index.html', videos=videos)  # warm-up
+            render_stats.reset()
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                html = render_template('index.html', videos=videos)
+                durations.append(time.perf_counter() - start)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    result = {
+        'compile_cold_ms': cold * 1000,
+        'compile_warm_ms': warm * 1000,
+        'render_ms': statistics.median(durations) * 1000,
+    }
+    print(f"compile {len(templates)} templates: {result['compile_cold_ms']:.1f} ms cold, "
+          f"{result['compile_warm_ms']:.1f} ms from bytecode cache")
+    print(f"render index.html with {args.videos} videos: {result['render_ms']:.1f} ms median "
+          f"of {args.runs} ({len(html) / 1024:.0f} KiB)")
+    print(f"{'template / block':40} {'calls':>6} {'total ms':>10} {'mean ms':>9} {'max ms':>9}")
+    for name, count, total, mean, worst in render_stats.report(args.top):
+        print(f"{name:40} {count:6d} {total:10.1f} {mean:9.2f} {worst:9.2f}")
+
+    compare_baseline(result, ('compile_warm_ms', 'render_ms'), args)
+
+
+if __name__ == '__main__':
+    main()
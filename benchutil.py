@@ -0,0 +1,42 @@
+# benchutil.py
+"""Baseline handling shared by the bench_*.py scripts"""
+import json
+import sys
+
+
+def add_baseline_args(parser):
+    parser.add_argument('--save', metavar='PATH', help='write results as a baseline')
+    parser.add_argument('--baseline', metavar='PATH', help='compare against a saved baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown over the baseline (default 20%%)')
+
+
+def compare_baseline(result, keys, args, failed=False, exact=()):
+    """Compare `keys` of `result` with --baseline, write --save, then exit.
+
+    `result` maps keys to numbers, or names (routes, scenarios) to such
+    maps. Keys in `exact` are deterministic counts, so any increase over
+    the baseline is a regression. Exits 1 if anything regressed or the
+    caller already `failed`.
+    """
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        nested = all(isinstance(value, dict) for value in result.values())
+        groups = result.items() if nested else [(None, result)]
+        for name, metrics in groups:
+            base = baseline.get(name) if nested else baseline
+            if base is None:
+                continue
+            for key in keys:
+                limit = base[key] if key in exact else base[key] * (1 + args.tolerance)
+                status = 'ok' if metrics[key] <= limit else 'REGRESSION'
+                label = f"{name} {key}" if nested else key
+                print(f"{label}: {metrics[key]:.1f} vs baseline {base[key]:.1f} ({status})")
+                failed = failed or metrics[key] > limit
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    sys.exit(1 if failed else 0)
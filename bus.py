@@ -0,0 +1,188 @@
+# bus.py
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, insert
+
+from extensions import db, get_redis
+from models import Rating, BusEvent
+
+# Committed changes to these models are published as (topic, key)
+CHANGE_TOPICS = {
+    Rating: ('ratings', lambda rating: rating.video_id),
+}
+RETENTION = timedelta(minutes=10)  # Database bus rows older than this are pruned
+
+
+class LocalBus:
+    """Delivers invalidations to subscribers in this process only.
+
+    The other buses deliver locally the same way, then broadcast to other
+    processes, which skip messages carrying their own `origin`.
+    """
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._subscribers = defaultdict(list)
+
+    def subscribe(self, topic, callback):
+        self._subscribers[topic].append(callback)
+
+    def publish(self, topic, key):
+        self._deliver(topic, str(key))
+        self._broadcast(topic, str(key))
+
+    def _deliver(self, topic, key):
+        for callback in self._subscribers[topic]:
+            callback(key)
+
+    def _broadcast(self, topic, key):
+        pass
+
+    def start(self, app):
+        pass
+
+
+class RedisBus(LocalBus):
+    """Broadcasts over a Redis pub/sub channel"""
+
+    def __init__(self, client, channel='invalidations'):
+        super().__init__()
+        self.client = client
+        self.channel = channel
+
+    def _broadcast(self, topic, key):
+        self.client.publish(self.channel, json.dumps({'origin': self.origin, 'topic': topic, 'key': key}))
+
+    def start(self, app):
+        def run():
+            while True:
+                try:
+                    pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(self.channel)
+                    for message in pubsub.listen():
+                        data = json.loads(message['data'])
+                        if data['origin'] != self.origin:
+                            self._deliver(data['topic'], data['key'])
+                except Exception:
+                    app.logger.exception('Invalidation listener failed; reconnecting')
+                    time.sleep(1)
+
+        thread = threading.Thread(target=run, name='invalidation-bus', daemon=True)
+        thread.start()
+        return thread
+
+
+class DatabaseBus(LocalBus):
+    """Broadcasts through a table every process polls.
+
+    Needs nothing beyond the shared database, at the cost of up to
+    `poll_interval` seconds of delay. Ids from concurrent transactions can
+    commit out of order, so an event can be missed; CACHE_TTL bounds how
+    long that leaves a stale entry.
+    """
+
+    def __init__(self, poll_interval=1.0):
+        super().__init__()
+        self.poll_interval = poll_interval
+        self.last_id = None
+
+    def _broadcast(self, topic, key):
+        # Own transaction: this runs after the app's session has committed
+        with db.engine.begin() as conn:
+            conn.execute(insert(BusEvent), {'topic': topic, 'key': key, 'origin': self.origin,
+                                            'created_at': datetime.utcnow()})
+
+    def poll(self):
+        """Deliver events published by other processes since the last poll"""
+        with db.engine.begin() as conn:
+            if self.last_id is None:
+                # Start from now; caches are empty when a process starts
+                self.last_id = conn.execute(db.select(db.func.max(BusEvent.id))).scalar() or 0
+                return 0
+            rows = conn.execute(db.select(BusEvent.id, BusEvent.topic, BusEvent.key, BusEvent.origin)
+                                .where(BusEvent.id > self.last_id).order_by(BusEvent.id)).all()
+        for row in rows:
+            if row.origin != self.origin:
+                self._deliver(row.topic, row.key)
+            self.last_id = row.id
+        return len(rows)
+
+    def prune(self):
+        with db.engine.begin() as conn:
+            conn.execute(db.delete(BusEvent).where(BusEvent.created_at < datetime.utcnow() - RETENTION))
+
+    def start(self, app):
+        def run():
+            last_prune = time.monotonic()
+            while True:
+                time.sleep(self.poll_interval)
+                with app.app_context():
+                    try:
+                        self.poll()
+                        if time.monotonic() - last_prune >= RETENTION.total_seconds():
+                            self.prune()
+                            last_prune = time.monotonic()
+                    except Exception:
+                        app.logger.exception('Invalidation poll failed')
+
+        thread = threading.Thread(target=run, name='invalidation-bus', daemon=True)
+        thread.start()
+        return thread
+
+
+def _collect_changes(session, flush_context):
+    # Keys are read now, while new, changed and deleted rows are still listed
+    changes = session.info.setdefault('bus_changes', set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        topic = CHANGE_TOPICS.get(type(obj))
+        if topic:
+            changes.add((topic[0], topic[1](obj)))
+
+
+def publish_on_commit(session, topic, key):
+    """Publish a change made by a Core statement, which the ORM doesn't track"""
+    session.info.setdefault('bus_changes', set()).add((topic, key))
+
+
+def _publish_changes(session):
+    changes = session.info.pop('bus_changes', None)
+    if changes:
+        bus = get_bus()
+        for topic, key in changes:
+            bus.publish(topic, key)
+
+
+def _discard_changes(session):
+    session.info.pop('bus_changes', None)
+
+
+def init_bus(app):
+    """Build the configured bus and publish model changes on commit"""
+    backend = app.config.get('BUS_BACKEND', 'local')
+    if backend == 'redis':
+        bus = RedisBus(get_redis(app))
+    elif backend == 'database':
+        bus = DatabaseBus(app.config.get('BUS_POLL_INTERVAL', 1.0))
+    elif backend == 'local':
+        bus = LocalBus()
+    else:
+        raise ValueError(f"Unknown BUS_BACKEND: {backend}")
+    app.extensions['bus'] = bus
+
+    if not event.contains(db.session, 'after_flush', _collect_changes):
+        event.listen(db.session, 'after_flush', _collect_changes)
+        event.listen(db.session, 'after_commit', _publish_changes)
+        event.listen(db.session, 'after_rollback', _discard_changes)
+    # Remote invalidations matter in every process, not just the one
+    # running background jobs
+    bus.start(app)
+    return bus
+
+
+def get_bus():
+    return current_app.extensions['bus']
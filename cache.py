@@ -0,0 +1,60 @@
+# cache.py
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from bus import CHANGE_TOPICS
+
+
+class LocalCache:
+    """Per-process LRU cache whose namespaces follow invalidation bus topics.
+
+    Entries are dropped when the bus reports a change to their key; `ttl` is
+    only a backstop for invalidations that never arrive.
+    """
+
+    def __init__(self, max_entries=10000, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # (namespace, key) -> (expires, value)
+        self._lock = threading.Lock()
+        self._invalidations = 0
+
+    def get_or_load(self, namespace, key, loader):
+        entry_key = (namespace, str(key))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(entry_key)
+                return entry[1]
+            invalidations = self._invalidations
+        value = loader()
+        with self._lock:
+            # Something changed while loading, so the value may be stale
+            if invalidations != self._invalidations:
+                return value
+            self._entries[entry_key] = (now + self.ttl, value)
+            self._entries.move_to_end(entry_key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, namespace, key):
+        with self._lock:
+            self._invalidations += 1
+            self._entries.pop((namespace, str(key)), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+cache = LocalCache()
+
+
+def init_cache(app, bus):
+    cache.ttl = app.config.get('CACHE_TTL', 300)
+    for topic, _ in CHANGE_TOPICS.values():
+        bus.subscribe(topic, partial(cache.invalidate, topic))
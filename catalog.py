@@ -0,0 +1,248 @@
+# catalog.py
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, jsonify
+from flask_login import current_user, login_required
+from werkzeug.utils import secure_filename
+from datetime import datetime
+
+from extensions import db
+from models import User, Video, Comment, Rating
+from forms import CommentForm, RatingForm, UploadForm, UpdateVideoForm
+from utils import allowed_file, has_purchased, average_rating, upsert
+from storage import get_storage
+from recommendations import related_videos
+from probe import ProbeError, apply_probe, probe_file, request_probe, reset_probe
+from bus import publish_on_commit
+
+bp = Blueprint('catalog', __name__)
+
+# Every sort column is indexed; view and completion counts are maintained by
+# the watch-event rollups, duration by the media prober
+SORTS = {
+    'popular': Video.view_count.desc(),
+    'completion': Video.avg_watch_pct.desc(),
+    'shortest': Video.duration.asc(),
+    'longest': Video.duration.desc(),
+    'price_low': Video.price.asc(),
+    'price_high': Video.price.desc(),
+}
+QUALITIES = (480, 720, 1080, 2160)
+MAX_API_LIMIT = 200
+
+def catalog_query(args):
+    """Active videos filtered and sorted by query string arguments"""
+    # New uploads are listed once the prober has accepted them
+    query = Video.active().filter(Video.probe_status != 'pending')
+    min_minutes = args.get('min_minutes', type=float)
+    max_minutes = args.get('max_minutes', type=float)
+    min_height = args.get('min_height', type=int)
+    min_price = args.get('min_price', type=float)
+    max_price = args.get('max_price', type=float)
+    if min_minutes is not None:
+        query = query.filter(Video.duration >= min_minutes * 60)
+    if max_minutes is not None:
+        query = query.filter(Video.duration <= max_minutes * 60)
+    if min_height:
+        query = query.filter(Video.height >= min_height)
+    if min_price is not None:
+        query = query.filter(Video.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Video.price <= max_price)
+    order = SORTS.get(args.get('sort'), Video.date_posted.desc())
+    return query.order_by(order, Video.id.desc())
+
+@bp.route("/")
+@bp.route("/home")
+def home():
+    videos = catalog_query(request.args).all()
+    for video in videos:
+        video.average_rating = average_rating(video.id)
+    return render_template('index.html', videos=videos, qualities=QUALITIES)
+
+@bp.route("/api/videos")
+def api_videos():
+    """Catalog metadata as JSON, with the same filters and sorts as home"""
+    limit = min(max(request.args.get('limit', 50, type=int), 1), MAX_API_LIMIT)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    videos = catalog_query(request.args).offset(offset).limit(limit).all()
+    return jsonify(videos=[{
+        'id': video.id,
+        'title': video.title,
+        'price': video.price,
+        'duration': video.duration,
+        'width': video.width,
+        'height': video.height,
+        'video_codec': video.video_codec,
+        'bitrate': video.bitrate,
+        'url': url_for('catalog.video_detail', video_id=video.id, _external=True),
+    } for video in videos])
+
+@bp.route("/user/<string:username>")
+def user_profile(username):
+    user = User.query.filter_by(username=username).first_or_404()
+    videos = Video.active().filter_by(uploader=user).order_by(Video.date_posted.desc()).all()
+    return render_template('user_profile.html', user=user, videos=videos)
+
+@bp.route("/upload", methods=['GET', 'POST'])
+@login_required
+def upload():
+    form = UploadForm()
+    if form.validate_on_submit():
+        title = form.title.data
+        file = form.video.data
+        price = form.price.data
+
+        if file and allowed_file(file.filename):
+            # Stored under its content hash, so re-uploading the same master
+            # reuses the existing object
+            key = get_storage().save(file.stream, secure_filename(file.filename))
+
+            # Save video info to database
+            video = Video(title=title, filename=key, uploader=current_user, price=price)
+            db.session.add(video)
+            db.session.commit()
+            # Duration, resolution and codec are filled in off the request
+            request_probe()
+
+            flash('Video uploaded successfully!', 'success')
+            return redirect(url_for('catalog.home'))
+        else:
+            flash('Invalid file type. Allowed types are mp4, mov, avi, mkv.', 'danger')
+            return redirect(request.url)
+    return render_template('upload.html', title='Upload Video', form=form)
+
+@bp.route("/video/<int:video_id>", methods=['GET', 'POST'])
+def video_detail(video_id):
+    video = Video.get_active_or_404(video_id)
+    form_comment = CommentForm()
+    form_rating = RatingForm()
+
+    if current_user.is_authenticated:
+        has_access = has_purchased(current_user.id, video_id)
+    else:
+        has_access = False
+
+    if not has_access:
+        return redirect(url_for('payments.purchase_video', video_id=video.id))
+
+    if form_comment.validate_on_submit() and 'submit_comment' in request.form:
+        add_comment(video, form_comment.content.data)
+        flash('Your comment has been posted!', 'success')
+        return redirect(url_for('catalog.video_detail', video_id=video.id))
+
+    if form_rating.validate_on_submit() and 'submit_rating' in request.form:
+        save_rating(video, form_rating.score.data)
+        flash('Your rating has been saved!', 'success')
+        return redirect(url_for('catalog.video_detail', video_id=video.id))
+
+    comments = Comment.query.filter_by(video_id=video.id).order_by(Comment.date_commented.desc()).all()
+
+    return render_template('video_detail.html', video=video, comments=comments,
+                           form_comment=form_comment, form_rating=form_rating,
+                           average_rating=average_rating(video.id), has_access=has_access,
+                           related=related_videos(video.id))
+
+def add_comment(video, content):
+    comment = Comment(content=content, video=video, author=current_user)
+    db.session.add(comment)
+    db.session.commit()
+    return comment
+
+def save_rating(video, score):
+    # One INSERT ... ON CONFLICT DO UPDATE, so concurrent submits can't
+    # race into duplicate rows
+    stmt = upsert(Rating).values(video_id=video.id, user_id=current_user.id, score=score,
+                                 date_rated=datetime.utcnow())
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['video_id', 'user_id'],
+        set_={'score': stmt.excluded.score, 'date_rated': stmt.excluded.date_rated}))
+    publish_on_commit(db.session, 'ratings', video.id)
+    db.session.commit()
+
+def _interaction_target(video_id):
+    """The video, if the current user may comment on and rate it"""
+    video = Video.get_active_or_404(video_id)
+    if not has_purchased(current_user.id, video_id):
+        abort(403)
+    return video
+
+@bp.route("/api/video/<int:video_id>/comments", methods=['POST'])
+@login_required
+def post_comment(video_id):
+    # Returns just the new comment's markup, for the page to insert
+    video = _interaction_target(video_id)
+    form = CommentForm()
+    if not form.validate_on_submit():
+        return jsonify(errors=form.errors), 400
+    comment = add_comment(video, form.content.data)
+    return jsonify(html=render_template('_comment.html', comment=comment))
+
+@bp.route("/api/video/<int:video_id>/rating", methods=['POST'])
+@login_required
+def post_rating(video_id):
+    video = _interaction_target(video_id)
+    form = RatingForm()
+    if not form.validate_on_submit():
+        return jsonify(errors=form.errors), 400
+    save_rating(video, form.score.data)
+    return jsonify(score=form.score.data, average_rating=average_rating(video.id))
+
+@bp.route("/video/<int:video_id>/edit", methods=['GET', 'POST'])
+@login_required
+def edit_video(video_id):
+    video = Video.get_active_or_404(video_id)
+    if video.uploader != current_user:
+        abort(403)  # Forbidden access
+    
+    form = UpdateVideoForm()
+    if form.validate_on_submit():
+        video.title = form.title.data
+        video.price = form.price.data
+        replaced = False
+        if form.video.data:
+            # Save new video file; the old one is reclaimed by the orphan
+            # collector once nothing refers to it
+            file = form.video.data
+            key = get_storage().save(file.stream, secure_filename(file.filename))
+            # Identical content keeps its key, and its metadata still holds
+            if key != video.filename:
+                # Probed now, so an unreadable file never replaces one that
+                # buyers are watching
+                try:
+                    metadata = probe_file(key)
+                except ProbeError:
+                    flash('That file could not be read as a video.', 'danger')
+                    return redirect(request.url)
+                video.filename = key
+                if metadata is None:
+                    reset_probe(video)
+                    replaced = True
+                else:
+                    apply_probe(video, metadata)
+
+        db.session.commit()
+        if replaced:
+            request_probe()
+        flash('Your video has been updated!', 'success')
+        return redirect(url_for('catalog.video_detail', video_id=video.id))
+    
+    elif request.method == 'GET':
+        form.title.data = video.title
+        form.price.data = video.price
+    
+    return render_template('edit_video.html', title='Edit Video',
+                         form=form, video=video)
+
+@bp.route("/video/<int:video_id>/delete", methods=['POST'])
+@login_required
+def delete_video(video_id):
+    video = Video.get_active_or_404(video_id)
+    if video.uploader != current_user:
+        abort(403)
+    
+    # Hide the video now; the reaper purges related rows and the media
+    # file in the background
+    video.deleted_at = datetime.utcnow()
+    db.session.commit()
+    
+    flash('Your video has been deleted!', 'success')
+    return redirect(url_for('catalog.home'))
@@ -15,4 +15,39 @@ class Config:
     STRIPE_PUBLIC_KEY = os.environ.get('STRIPE_PUBLIC_KEY')
     STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
     STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET')
-    CDN_URL = os.environ.get('CDN_URL') or ''  # Empty if not using CDN
\ No newline at end of file
+    CDN_URL = os.environ.get('CDN_URL') or ''  # Empty if not using CDN
+    CDN_SIGNING_KEY = os.environ.get('CDN_SIGNING_KEY')
+    SIGNED_URL_TTL = int(os.environ.get('SIGNED_URL_TTL') or 300)  # Seconds
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND') or 'local'  # 'local' or 's3'
+    S3_BUCKET = os.environ.get('S3_BUCKET')
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')  # Set for MinIO or a local stand-in
+    S3_REGION = os.environ.get('S3_REGION')
+    REAPER_INTERVAL = int(os.environ.get('REAPER_INTERVAL') or 60)  # Seconds; 0 disables the background reaper
+    ORPHAN_SCAN_INTERVAL = int(os.environ.get('ORPHAN_SCAN_INTERVAL') or 3600)
+    # Compiled templates shared by all workers and kept across restarts
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR') or os.path.join(basedir, '.jinja_cache')
+    TEMPLATE_PROFILING = os.environ.get('TEMPLATE_PROFILING') == '1'
+    EVENT_FLUSH_INTERVAL_MS = int(os.environ.get('EVENT_FLUSH_INTERVAL_MS') or 2000)
+    EVENT_FLUSH_BATCH = int(os.environ.get('EVENT_FLUSH_BATCH') or 500)  # Flush early once this many are buffered
+    EVENT_ROLLUP_INTERVAL = int(os.environ.get('EVENT_ROLLUP_INTERVAL') or 60)  # Seconds
+    RECOMMENDATION_INTERVAL = int(os.environ.get('RECOMMENDATION_INTERVAL') or 300)  # Seconds; 0 disables the background job
+    RECOMMENDATION_TOP_K = int(os.environ.get('RECOMMENDATION_TOP_K') or 10)
+    PROBE_INTERVAL = int(os.environ.get('PROBE_INTERVAL') or 30)  # Seconds between sweeps for unprobed uploads
+    PROBE_TIMEOUT = int(os.environ.get('PROBE_TIMEOUT') or 30)
+    FFPROBE_PATH = os.environ.get('FFPROBE_PATH') or 'ffprobe'
+    # Werkzeug method string; existing hashes are upgraded on the next successful login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'pbkdf2:sha256:600000'
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 4)  # 0 hashes on the request thread
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE') or 32)  # Hashes waiting or running before logins get a 503
+    LOGIN_IP_LIMIT = int(os.environ.get('LOGIN_IP_LIMIT') or 10)  # Attempts per minute; 0 disables
+    LOGIN_ACCOUNT_LIMIT = int(os.environ.get('LOGIN_ACCOUNT_LIMIT') or 5)
+    # Multi-node deployments: share sessions and cache invalidations between processes
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND') or 'cookie'  # 'cookie', 'redis' or 'database'
+    BUS_BACKEND = os.environ.get('BUS_BACKEND') or 'local'  # 'local', 'redis' or 'database'
+    REDIS_URL = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
+    BUS_POLL_INTERVAL = float(os.environ.get('BUS_POLL_INTERVAL') or 1.0)  # Seconds, database bus only
+    CACHE_TTL = int(os.environ.get('CACHE_TTL') or 300)  # Backstop in case an invalidation is missed
+    # Read replicas, comma separated; reads during requests are spread over them
+    SQLALCHEMY_REPLICA_URIS = [uri for uri in (os.environ.get('SQLALCHEMY_REPLICA_URIS') or '').split(',') if uri]
+    READ_PRIMARY_SECONDS = float(os.environ.get('READ_PRIMARY_SECONDS') or 5)  # Longer than the worst replica lag
+    AVAILABILITY_REFRESH_INTERVAL = int(os.environ.get('AVAILABILITY_REFRESH_INTERVAL') or 3600)  # Seconds between username/email filter rebuilds
\ No newline at end of file
@@ -3,8 +3,18 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
 
-db = SQLAlchemy()
+from routing import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})  # Reads can go to replicas
 migrate = Migrate()
 login_manager = LoginManager()
-login_manager.login_view = 'login'  # Redirect to 'login' for @login_required
-login_manager.login_message_category = 'info'
\ No newline at end of file
+login_manager.login_view = 'auth.login'  # Redirect to 'auth.login' for @login_required
+login_manager.login_message_category = 'info'
+
+def get_redis(app):
+    """Redis client shared by the session store and the invalidation bus"""
+    # redis is only needed when a backend is configured to use it
+    if 'redis' not in app.extensions:
+        import redis
+        app.extensions['redis'] = redis.Redis.from_url(app.config['REDIS_URL'])
+    return app.extensions['redis']
@@ -3,7 +3,7 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, TextAreaField, FileField, IntegerField
 from wtforms.validators import DataRequired, Length, Email, EqualTo, ValidationError, NumberRange
 from flask_wtf.file import FileAllowed
-from models import User
+from availability import get_availability
 from flask_login import current_user
 
 class RegistrationForm(FlaskForm):
@@ -19,13 +19,11 @@ class RegistrationForm(FlaskForm):
 
     # Custom validators to check for existing users
     def validate_username(self, username):
-        user = User.query.filter_by(username=username.data).first()
-        if user:
+        if not get_availability().is_free('username', username.data):
             raise ValidationError('That username is taken. Please choose a different one.')
 
     def validate_email(self, email):
-        user = User.query.filter_by(email=email.data).first()
-        if user:
+        if not get_availability().is_free('email', email.data):
             raise ValidationError('That email is already registered.')
 
 class LoginForm(FlaskForm):
@@ -46,14 +44,12 @@ class UpdateAccountForm(FlaskForm):
 
     def validate_username(self, username):
         if username.data != current_user.username:
-            user = User.query.filter_by(username=username.data).first()
-            if user:
+            if not get_availability().is_free('username', username.data):
                 raise ValidationError('That username is taken. Please choose a different one.')
 
     def validate_email(self, email):
         if email.data != current_user.email:
-            user = User.query.filter_by(email=email.data).first()
-            if user:
+            if not get_availability().is_free('email', email.data):
                 raise ValidationError('That email is already registered.')
 
 class CommentForm(FlaskForm):
@@ -0,0 +1,101 @@
+# lesson_analytics.py
+import sqlite3
+import threading
+import pandas as pd
+from lesson_db import DB_PATH
+from lesson_schedule import DAYS
+
+STATUSES = ['Pending', 'Confirmed', 'Completed', 'Cancelled']
+
+
+class BookingStats:
+    """Demand aggregates over every booking, cached until a booking changes.
+
+    Bookings are loaded once into a compact frame and aggregated with
+    pandas. Any insert, delete or update moves the (count, max id,
+    revision total) fingerprint, since the revision trigger bumps on every
+    update and on offering renames. A rerun with no writes therefore
+    costs one aggregate query.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._fingerprint = None
+        self._frame = None
+        self._summary = None
+        self._lock = threading.Lock()
+
+    def _load(self, conn):
+        frame = pd.read_sql_query("""
+            SELECT o.name AS lesson, COALESCE(b.status, 'Pending') AS status, b.starts_at
+            FROM lesson_bookings b
+            JOIN lesson_offerings o ON b.lesson_id = o.id
+            WHERE b.starts_at IS NOT NULL
+        """, conn)
+        frame['lesson'] = frame['lesson'].astype('category')
+        frame['status'] = pd.Categorical(frame['status'], categories=STATUSES)
+        frame['starts_at'] = pd.to_datetime(frame['starts_at'])
+        return frame
+
+    def frame(self):
+        """All bookings with a start time: lesson, status, starts_at"""
+        with self._lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                fingerprint = conn.execute(
+                    "SELECT COUNT(*), MAX(id), TOTAL(revision) FROM lesson_bookings").fetchone()
+                if fingerprint != self._fingerprint:
+                    self._frame = self._load(conn)
+                    self._summary = None
+                    self._fingerprint = fingerprint
+                return self._frame
+            finally:
+                conn.close()
+
+    def summary(self):
+        """Heatmap, conversion and weekly trend for all lessons, cached with the frame"""
+        frame = self.frame()
+        with self._lock:
+            if self._summary is None:
+                self._summary = {
+                    'heatmap': demand_heatmap(frame),
+                    'conversion': conversion(frame),
+                    'weekly': weekly_trend(frame),
+                }
+            return self._summary
+
+
+def demand_heatmap(frame):
+    """Bookings per weekday and start hour, in long form for charting"""
+    counts = pd.crosstab(frame['starts_at'].dt.dayofweek.rename('day'),
+                         frame['starts_at'].dt.hour.rename('hour'))
+    counts = counts.reindex(index=range(7), fill_value=0)
+    heatmap = counts.stack().rename('bookings').reset_index()
+    heatmap['day'] = heatmap['day'].map(dict(enumerate(DAYS)))
+    heatmap['hour'] = heatmap['hour'].map(lambda hour: f"{hour:02d}:00")
+    return heatmap
+
+
+def conversion(frame):
+    """Pending -> Confirmed -> Completed funnel per lesson type"""
+    counts = pd.crosstab(frame['lesson'], frame['status'], dropna=False).reindex(columns=STATUSES, fill_value=0)
+    table = pd.DataFrame({
+        'Bookings': counts.sum(axis=1),
+        # Completed lessons were confirmed first
+        'Confirmed': counts['Confirmed'] + counts['Completed'],
+        'Completed': counts['Completed'],
+        'Cancelled': counts['Cancelled'],
+    })
+    table['Confirm rate'] = table['Confirmed'] / table['Bookings'].where(table['Bookings'] > 0)
+    table['Completion rate'] = table['Completed'] / table['Confirmed'].where(table['Confirmed'] > 0)
+    return table.sort_values('Bookings', ascending=False)
+
+
+def weekly_trend(frame):
+    """Bookings per lesson week (starting Monday) and status"""
+    weeks = frame['starts_at'].dt.to_period('W-SUN').dt.start_time.rename('week')
+    return pd.crosstab(weeks, frame['status'], dropna=False).reindex(columns=STATUSES, fill_value=0)
+
+
+# Shared by all sessions in the process
+stats = BookingStats()
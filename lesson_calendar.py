@@ -0,0 +1,172 @@
+# lesson_calendar.py
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from wsgiref.simple_server import make_server
+from lesson_db import DB_PATH
+
+# Completed lessons stay on the calendar; only cancelled or deleted ones leave it
+FEED_STATUSES = ('Confirmed', 'Completed')
+PRODID = '-//Lessons by Asti//Lesson Calendar//EN'
+UID_DOMAIN = 'lessons-by-asti'
+
+
+def _escape(text):
+    # RFC 5545 TEXT escaping
+    return (str(text or '').replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line):
+    # Content lines are limited to 75 octets; continuation lines start
+    # with a single space
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line + '\r\n'
+    parts = []
+    while data:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(data))
+        # Don't split a multi-byte character
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode('utf-8'))
+        data = data[cut:]
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _ics_datetime(value):
+    return datetime.fromisoformat(value).strftime('%Y%m%dT%H%M%S')
+
+
+def render_event(booking_id, lesson_name, student_name, student_email, starts_at, ends_at,
+                 musical_goals, revision, stamp):
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:booking-{booking_id}@{UID_DOMAIN}',
+        f'DTSTAMP:{stamp}',
+        f'SEQUENCE:{revision}',
+        f'DTSTART:{_ics_datetime(starts_at)}',
+        f'DTEND:{_ics_datetime(ends_at)}',
+        f'SUMMARY:{_escape(f"{lesson_name} with {student_name}")}',
+        f'DESCRIPTION:{_escape(f"Student: {student_name} <{student_email}>")}'
+        f'{_escape(chr(10) + "Goals: " + musical_goals) if musical_goals else ""}',
+        'END:VEVENT',
+    ]
+    return ''.join(_fold(line) for line in lines)
+
+
+class CalendarFeed:
+    """ICS feed of confirmed and completed bookings, rebuilt incrementally.
+
+    Each booking carries a `revision` counter bumped by a trigger on every
+    update. A build reads only (id, revision) pairs, re-renders the events
+    whose revision changed, and drops those that left the feed. The ETag is
+    derived from the same pairs, so an unchanged feed costs one indexed
+    query.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._events = {}  # booking id -> (revision, rendered VEVENT)
+        self._etag = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def _revisions(self, conn):
+        placeholders = ','.join('?' * len(FEED_STATUSES))
+        return dict(conn.execute(f"""
+            SELECT id, revision FROM lesson_bookings
+            WHERE status IN ({placeholders}) AND starts_at IS NOT NULL
+            ORDER BY id
+        """, FEED_STATUSES).fetchall())
+
+    @staticmethod
+    def _etag_for(revisions):
+        digest = hashlib.sha1()
+        for booking_id, revision in revisions.items():
+            digest.update(f'{booking_id}:{revision};'.encode())
+        return f'"{digest.hexdigest()}"'
+
+    def refresh(self):
+        """Bring cached events up to date; returns the current ETag"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                revisions = self._revisions(conn)
+                etag = self._etag_for(revisions)
+                if etag == self._etag:
+                    return etag
+                stale = [booking_id for booking_id, revision in revisions.items()
+                         if self._events.get(booking_id, (None,))[0] != revision]
+                for booking_id in set(self._events) - set(revisions):
+                    del self._events[booking_id]
+                stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+                # Chunk the IN list to stay under SQLite's variable limit
+                for i in range(0, len(stale), 500):
+                    chunk = stale[i:i + 500]
+                    rows = conn.execute(f"""
+                        SELECT b.id, o.name, b.student_name, b.student_email, b.starts_at,
+                               b.ends_at, b.musical_goals, b.revision
+                        FROM lesson_bookings b
+                        JOIN lesson_offerings o ON b.lesson_id = o.id
+                        WHERE b.id IN ({','.join('?' * len(chunk))})
+                    """, chunk).fetchall()
+                    for row in rows:
+                        self._events[row[0]] = (row[7], render_event(*row, stamp=stamp))
+                self._etag = etag
+                return etag
+            finally:
+                conn.close()
+
+    def iter_ics(self):
+        """Yield the feed in chunks, refreshing it first"""
+        self.refresh()
+        with self._lock:
+            events = [self._events[booking_id][1] for booking_id in sorted(self._events)]
+        yield f'BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:{PRODID}\r\nCALSCALE:GREGORIAN\r\n'
+        yield _fold('X-WR-CALNAME:Lessons by Asti')
+        yield from events
+        yield 'END:VCALENDAR\r\n'
+
+    def build(self):
+        return ''.join(self.iter_ics())
+
+    def count(self):
+        """Bookings in the feed, without rendering it"""
+        placeholders = ','.join('?' * len(FEED_STATUSES))
+        conn = self._connect()
+        try:
+            return conn.execute(f"""
+                SELECT COUNT(*) FROM lesson_bookings
+                WHERE status IN ({placeholders}) AND starts_at IS NOT NULL
+            """, FEED_STATUSES).fetchone()[0]
+        finally:
+            conn.close()
+
+    def __len__(self):
+        return len(self._events)
+
+    def wsgi_app(self, environ, start_response):
+        """Subscribable feed endpoint honouring If-None-Match"""
+        etag = self.refresh()
+        headers = [('ETag', etag), ('Cache-Control', 'private, max-age=300')]
+        if environ.get('HTTP_IF_NONE_MATCH') == etag:
+            start_response('304 Not Modified', headers)
+            return []
+        start_response('200 OK', headers + [('Content-Type', 'text/calendar; charset=utf-8')])
+        return (chunk.encode('utf-8') for chunk in self.iter_ics())
+
+
+# Shared by all sessions in the process
+feed = CalendarFeed()
+
+
+if __name__ == '__main__':
+    port = int(os.environ.get('CALENDAR_FEED_PORT', 8502))
+    print(f"Serving lesson calendar feed on http://localhost:{port}/lessons.ics")
+    make_server('', port, feed.wsgi_app).serve_forever()
@@ -0,0 +1,153 @@
+# lesson_db.py
+import sqlite3
+import threading
+from datetime import timedelta
+
+DB_PATH = 'jazz_woodwinds.db'
+
+
+def _create_base_tables(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS lesson_offerings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            price TEXT,
+            image_path TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS lesson_bookings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lesson_id INTEGER NOT NULL REFERENCES lesson_offerings(id),
+            student_name TEXT NOT NULL,
+            student_email TEXT NOT NULL,
+            preferred_day TEXT,
+            preferred_time TEXT,
+            musical_goals TEXT
+        )
+    """)
+
+
+def _add_booking_status_columns(conn):
+    # Databases created before versioning may already have these columns
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(lesson_bookings)")}
+    if 'status' not in columns:
+        conn.execute("ALTER TABLE lesson_bookings ADD COLUMN status TEXT DEFAULT 'Pending'")
+    if 'admin_notes' not in columns:
+        conn.execute("ALTER TABLE lesson_bookings ADD COLUMN admin_notes TEXT")
+
+
+def _add_booking_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_lesson_bookings_lesson_id ON lesson_bookings (lesson_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_lesson_bookings_status ON lesson_bookings (status)")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS ix_lesson_bookings_day_time
+        ON lesson_bookings (preferred_day, preferred_time)
+    """)
+
+
+def _add_booking_times(conn):
+    from lesson_schedule import DEFAULT_DURATION, next_occurrence
+    conn.execute(f"ALTER TABLE lesson_offerings ADD COLUMN duration_minutes INTEGER DEFAULT {DEFAULT_DURATION}")
+    conn.execute("ALTER TABLE lesson_bookings ADD COLUMN starts_at TEXT")
+    conn.execute("ALTER TABLE lesson_bookings ADD COLUMN ends_at TEXT")
+    # Older bookings only recorded a weekday and time; pin them to their
+    # next occurrence so they take part in conflict detection
+    rows = conn.execute("""
+        SELECT id, preferred_day, preferred_time FROM lesson_bookings
+        WHERE preferred_day IS NOT NULL AND preferred_time IS NOT NULL
+    """).fetchall()
+    for booking_id, day, time_str in rows:
+        try:
+            start = next_occurrence(day, time_str)
+        except ValueError:
+            continue
+        end = start + timedelta(minutes=DEFAULT_DURATION)
+        conn.execute("UPDATE lesson_bookings SET starts_at = ?, ends_at = ? WHERE id = ?",
+                     (start.isoformat(), end.isoformat(), booking_id))
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_lesson_bookings_starts_at ON lesson_bookings (starts_at, ends_at)")
+
+
+def _add_booking_revisions(conn):
+    # Bumped on every change so the calendar feed can re-render only the
+    # bookings that changed since its last build
+    conn.execute("ALTER TABLE lesson_bookings ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS tr_lesson_bookings_revision
+        AFTER UPDATE ON lesson_bookings
+        WHEN NEW.revision = OLD.revision
+        BEGIN
+            UPDATE lesson_bookings SET revision = OLD.revision + 1 WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS tr_lesson_offerings_revision
+        AFTER UPDATE OF name ON lesson_offerings
+        BEGIN
+            UPDATE lesson_bookings SET revision = revision + 1 WHERE lesson_id = NEW.id;
+        END
+    """)
+
+
+def _add_calendar_sync(conn):
+    # What was last pushed to Google Calendar for each booking, so a sync
+    # pass only sends bookings that changed since
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS lesson_calendar_sync (
+            booking_id INTEGER PRIMARY KEY,
+            event_id TEXT NOT NULL,
+            revision INTEGER NOT NULL,
+            body_hash TEXT NOT NULL,
+            synced_at TEXT NOT NULL
+        )
+    """)
+
+
+# Append only: the position of a migration in this list is its version
+# number, stored in PRAGMA user_version once it has been applied
+MIGRATIONS = [
+    _create_base_tables,
+    _add_booking_status_columns,
+    _add_booking_indexes,
+    _add_booking_times,
+    _add_booking_revisions,
+    _add_calendar_sync,
+]
+
+_migrated = set()
+_migrate_lock = threading.Lock()
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(db_path=DB_PATH):
+    """Bring the database up to the latest schema version.
+
+    Runs at most once per database per process, so it is safe to call on
+    every Streamlit rerun.
+    """
+    if db_path in _migrated:
+        return
+    with _migrate_lock:
+        if db_path in _migrated:
+            return
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        try:
+            # Take the write lock before reading the version so concurrent
+            # processes don't apply the same migration twice
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = schema_version(conn)
+                for version, migration in enumerate(MIGRATIONS[current:], start=current + 1):
+                    migration(conn)
+                    conn.execute(f"PRAGMA user_version = {version}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+        _migrated.add(db_path)
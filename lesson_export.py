@@ -0,0 +1,93 @@
+# lesson_export.py
+import csv
+import io
+import sqlite3
+import tempfile
+from datetime import datetime, time as dtime, timedelta
+from lesson_db import DB_PATH
+
+EXPORT_COLUMNS = [
+    'ID',
+    'Lesson Type',
+    'Student Name',
+    'Email',
+    'Day',
+    'Time',
+    'Musical Goals',
+    'Status',
+    'Admin Notes',
+    'Starts At',
+]
+CHUNK_SIZE = 1000
+# Exports larger than this spill from memory to a temporary file
+SPOOL_LIMIT = 8 * 1024 * 1024
+
+
+def iter_booking_chunks(start_date=None, end_date=None, chunk_size=CHUNK_SIZE, db_path=DB_PATH):
+    """Yield lists of booking rows straight from the cursor.
+
+    `start_date` and `end_date` are inclusive dates matched against the
+    booking's start time.
+    """
+    clauses, params = [], []
+    if start_date:
+        clauses.append("b.starts_at >= ?")
+        params.append(datetime.combine(start_date, dtime()).isoformat())
+    if end_date:
+        clauses.append("b.starts_at < ?")
+        params.append(datetime.combine(end_date + timedelta(days=1), dtime()).isoformat())
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute(f"""
+            SELECT b.id, o.name, b.student_name, b.student_email, b.preferred_day,
+                   b.preferred_time, b.musical_goals, b.status, b.admin_notes, b.starts_at
+            FROM lesson_bookings b
+            JOIN lesson_offerings o ON b.lesson_id = o.id
+            {where}
+            ORDER BY b.starts_at
+        """, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
+def write_csv(out, chunks):
+    text = io.TextIOWrapper(out, encoding='utf-8', newline='', write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in chunks:
+        writer.writerows(rows)
+    # Hand the underlying binary file back to the caller open
+    text.detach()
+
+
+def write_parquet(out, chunks):
+    # pyarrow is only needed when someone actually asks for Parquet
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([('ID', pa.int64())] + [(name, pa.string()) for name in EXPORT_COLUMNS[1:]])
+    with pq.ParquetWriter(out, schema) as writer:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_batch(pa.record_batch([list(col) for col in columns], schema=schema))
+
+
+EXPORT_FORMATS = {
+    'CSV': (write_csv, 'csv', 'text/csv'),
+    'Parquet': (write_parquet, 'parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def export_bookings(fmt='CSV', start_date=None, end_date=None, db_path=DB_PATH):
+    """Write the export chunk by chunk and return it as bytes"""
+    writer, _, _ = EXPORT_FORMATS[fmt]
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_LIMIT) as out:
+        writer(out, iter_booking_chunks(start_date, end_date, db_path=db_path))
+        out.seek(0)
+        return out.read()
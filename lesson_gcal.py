@@ -0,0 +1,320 @@
+# lesson_gcal.py
+"""Push confirmed and completed lessons to Google Calendar in the background.
+
+Authorize once from a terminal, which runs the OAuth flow and writes
+token.json; the app itself never opens a browser:
+
+    python lesson_gcal.py authorize
+    python lesson_gcal.py sync        # one pass, without Streamlit
+
+Set GOOGLE_CALENDAR_API_ENDPOINT (e.g. http://127.0.0.1:8600/calendar/v3/)
+to point the client at a local fake of the Calendar API, and LESSON_TIMEZONE
+(e.g. Europe/Berlin) if the studio isn't in the server's time zone.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from lesson_calendar import FEED_STATUSES
+from lesson_db import DB_PATH
+
+SCOPES = ['https://www.googleapis.com/auth/calendar']
+TOKEN_PATH = 'token.json'
+CLIENT_SECRETS_PATH = 'credentials.json'
+CALENDAR_ID = os.environ.get('GOOGLE_CALENDAR_ID') or 'primary'
+# Bookings store wall-clock times; this says which wall. Unset, they are
+# read in the server's local zone and sent with its UTC offset
+TIMEZONE = os.environ.get('LESSON_TIMEZONE')  # IANA name, e.g. Europe/Berlin
+API_ENDPOINT = os.environ.get('GOOGLE_CALENDAR_API_ENDPOINT')
+SYNC_INTERVAL = int(os.environ.get('CALENDAR_SYNC_INTERVAL') or 300)  # Seconds between passes
+BATCH_SIZE = 50  # Google's recommended maximum per batch request
+REMINDERS = [{'method': 'email', 'minutes': 24 * 60}, {'method': 'popup', 'minutes': 60}]
+
+logger = logging.getLogger(__name__)
+
+
+class CalendarNotAuthorized(Exception):
+    """No usable token.json; run `python lesson_gcal.py authorize`"""
+
+
+class CalendarClient:
+    """One Calendar API client per process.
+
+    Credentials are read from token.json once. The client refreshes the
+    access token by itself when it expires, and the refreshed token is
+    written back so a restart doesn't need a refresh first.
+    """
+
+    def __init__(self, token_path=TOKEN_PATH, endpoint=API_ENDPOINT, credentials=None):
+        self.token_path = token_path
+        self.endpoint = endpoint
+        self._credentials = credentials
+        self._service = None
+        self._saved_token = None
+        self._lock = threading.Lock()
+
+    def _load_credentials(self):
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+
+        if not os.path.exists(self.token_path):
+            raise CalendarNotAuthorized(f"{self.token_path} not found")
+        creds = Credentials.from_authorized_user_file(self.token_path, SCOPES)
+        if not creds.valid:
+            if not creds.refresh_token:
+                raise CalendarNotAuthorized(f"{self.token_path} has expired and can't be refreshed")
+            creds.refresh(Request())
+        return creds
+
+    def service(self):
+        with self._lock:
+            if self._service is None:
+                from googleapiclient.discovery import build
+
+                if self._credentials is None:
+                    self._credentials = self._load_credentials()
+                    self._saved_token = self._credentials.token
+                options = {'api_endpoint': self.endpoint} if self.endpoint else None
+                self._service = build('calendar', 'v3', credentials=self._credentials,
+                                      client_options=options, cache_discovery=False)
+            return self._service
+
+    def new_batch(self, callback):
+        from googleapiclient.http import BatchHttpRequest
+        from urllib.parse import urljoin
+
+        service = self.service()
+        if self.endpoint:
+            # The batch URL comes from the discovery document, not the endpoint
+            return BatchHttpRequest(callback=callback,
+                                    batch_uri=urljoin(self.endpoint, '/batch/calendar/v3'))
+        return service.new_batch_http_request(callback=callback)
+
+    def save_token(self):
+        """Persist the access token if the client refreshed it"""
+        creds = self._credentials
+        if self._saved_token is None or creds is None or creds.token == self._saved_token:
+            return
+        with open(self.token_path, 'w') as token:
+            token.write(creds.to_json())
+        self._saved_token = creds.token
+
+
+def event_id(booking_id):
+    # Our own ids (base32hex, 5+ chars) make inserts idempotent
+    return f'lesson{booking_id:05d}'
+
+
+def event_time(value):
+    """Calendar API start/end for a stored wall-clock time"""
+    if TIMEZONE:
+        return {'dateTime': value, 'timeZone': TIMEZONE}
+    return {'dateTime': datetime.fromisoformat(value).astimezone().isoformat()}
+
+
+def event_body(booking_id, lesson_name, student_name, student_email, starts_at, ends_at,
+               musical_goals):
+    description = f"Student: {student_name} <{student_email}>"
+    if musical_goals:
+        description += f"\nGoals: {musical_goals}"
+    return {
+        'id': event_id(booking_id),
+        'status': 'confirmed',
+        'summary': f"{lesson_name} with {student_name}",
+        'description': description,
+        'start': event_time(starts_at),
+        'end': event_time(ends_at),
+        'attendees': [{'email': student_email, 'displayName': student_name}],
+        'reminders': {'useDefault': False, 'overrides': REMINDERS},
+    }
+
+
+def _body_hash(body):
+    return hashlib.sha1(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class CalendarSync:
+    """Mirrors confirmed and completed bookings into a Google Calendar.
+
+    lesson_calendar_sync records, per booking, the event id and the
+    revision and content hash last pushed. A pass reads only bookings whose
+    revision moved, sends those whose event content actually changed, and
+    deletes events for bookings that left the calendar, in batches of up
+    to BATCH_SIZE calls.
+    """
+
+    def __init__(self, client, db_path=DB_PATH, calendar_id=CALENDAR_ID):
+        self.client = client
+        self.db_path = db_path
+        self.calendar_id = calendar_id
+        self.errors = {}  # booking id -> last failure, retried on the next pass
+        self.last_sync = None
+
+    def _changed(self, conn):
+        placeholders = ','.join('?' * len(FEED_STATUSES))
+        rows = conn.execute(f"""
+            SELECT b.id, o.name, b.student_name, b.student_email, b.starts_at, b.ends_at,
+                   b.musical_goals, b.revision, s.event_id IS NOT NULL, s.body_hash
+            FROM lesson_bookings b
+            JOIN lesson_offerings o ON b.lesson_id = o.id
+            LEFT JOIN lesson_calendar_sync s ON s.booking_id = b.id
+            WHERE b.status IN ({placeholders}) AND b.starts_at IS NOT NULL
+            AND (s.booking_id IS NULL OR s.revision != b.revision)
+        """, FEED_STATUSES).fetchall()
+        return rows
+
+    def _removed(self, conn):
+        placeholders = ','.join('?' * len(FEED_STATUSES))
+        return conn.execute(f"""
+            SELECT s.booking_id, s.event_id
+            FROM lesson_calendar_sync s
+            LEFT JOIN lesson_bookings b ON b.id = s.booking_id
+            WHERE b.id IS NULL OR b.starts_at IS NULL OR COALESCE(b.status, '') NOT IN ({placeholders})
+        """, FEED_STATUSES).fetchall()
+
+    def _run_batches(self, calls):
+        """Execute (key, request) pairs in batches; returns {key: (response, error)}"""
+        results = {}
+
+        def callback(request_id, response, exception):
+            results[request_id] = (response, exception)
+
+        for i in range(0, len(calls), BATCH_SIZE):
+            batch = self.client.new_batch(callback)
+            for key, request in calls[i:i + BATCH_SIZE]:
+                batch.add(request, request_id=key)
+            batch.execute()
+        return results
+
+    def sync_once(self):
+        """Push one round of changes; returns (sent, deleted) counts"""
+        from googleapiclient.errors import HttpError
+
+        events = self.client.service().events()
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            upserts, unchanged = {}, []
+            for row in self._changed(conn):
+                booking_id, revision, synced, old_hash = row[0], row[7], row[8], row[9]
+                body = event_body(*row[:7])
+                body_hash = _body_hash(body)
+                if body_hash == old_hash:
+                    # Only something the event doesn't show changed, e.g. notes
+                    unchanged.append((revision, booking_id))
+                else:
+                    upserts[str(booking_id)] = (booking_id, revision, body, body_hash, synced)
+            removed = {str(booking_id): (booking_id, eid) for booking_id, eid in self._removed(conn)}
+
+            calls = []
+            for key, (booking_id, _, body, _, synced) in upserts.items():
+                if synced:
+                    calls.append((key, events.update(calendarId=self.calendar_id,
+                                                     eventId=body['id'], body=body)))
+                else:
+                    calls.append((key, events.insert(calendarId=self.calendar_id, body=body)))
+            calls += [(f'delete-{key}', events.delete(calendarId=self.calendar_id, eventId=eid))
+                      for key, (_, eid) in removed.items()]
+            results = self._run_batches(calls)
+
+            # Inserting an id that exists (e.g. a deleted event, or a pass
+            # that died before recording it) fails with 409; update instead
+            retries = [(key, events.update(calendarId=self.calendar_id,
+                                           eventId=upserts[key][2]['id'], body=upserts[key][2]))
+                       for key, (_, error) in results.items()
+                       if isinstance(error, HttpError) and error.resp.status == 409 and key in upserts]
+            results.update(self._run_batches(retries))
+
+            now = datetime.utcnow().isoformat()
+            sent, deleted = [], []
+            for key, (booking_id, revision, body, body_hash, _) in upserts.items():
+                error = results.get(key, (None, None))[1]
+                if error is None:
+                    sent.append((booking_id, body['id'], revision, body_hash, now))
+                    self.errors.pop(booking_id, None)
+                else:
+                    self.errors[booking_id] = str(error)
+            for key, (booking_id, _) in removed.items():
+                error = results.get(f'delete-{key}', (None, None))[1]
+                # Already gone on Google's side counts as deleted
+                if error is None or (isinstance(error, HttpError) and error.resp.status in (404, 410)):
+                    deleted.append((booking_id,))
+                    self.errors.pop(booking_id, None)
+                else:
+                    self.errors[booking_id] = str(error)
+
+            with conn:
+                conn.executemany("""
+                    INSERT INTO lesson_calendar_sync (booking_id, event_id, revision, body_hash, synced_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(booking_id) DO UPDATE SET
+                        event_id = excluded.event_id, revision = excluded.revision,
+                        body_hash = excluded.body_hash, synced_at = excluded.synced_at
+                """, sent)
+                conn.executemany("UPDATE lesson_calendar_sync SET revision = ? WHERE booking_id = ?",
+                                 unchanged)
+                conn.executemany("DELETE FROM lesson_calendar_sync WHERE booking_id = ?", deleted)
+        finally:
+            conn.close()
+        self.client.save_token()
+        self.last_sync = datetime.now()
+        return len(sent), len(deleted)
+
+
+# Shared by all sessions in the process
+sync = CalendarSync(CalendarClient())
+_wake = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def request_sync():
+    """Ask the worker to run a pass now instead of at the next interval"""
+    _wake.set()
+
+
+def start_worker(interval=SYNC_INTERVAL):
+    """Start the sync thread once per process; later calls do nothing"""
+    global _worker
+    with _worker_lock:
+        if _worker is not None:
+            return _worker
+
+        def run():
+            while True:
+                try:
+                    sync.sync_once()
+                except CalendarNotAuthorized:
+                    pass  # Nothing to sync to until someone authorizes
+                except Exception:
+                    logger.exception('Calendar sync failed')
+                _wake.wait(interval)
+                _wake.clear()
+
+        _worker = threading.Thread(target=run, name='calendar-sync', daemon=True)
+        _worker.start()
+        return _worker
+
+
+def authorize():
+    """Run the OAuth consent flow in a browser and save token.json"""
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    flow = InstalledAppFlow.from_client_secrets_file(CLIENT_SECRETS_PATH, SCOPES)
+    creds = flow.run_local_server(port=0)
+    with open(TOKEN_PATH, 'w') as token:
+        token.write(creds.to_json())
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'sync'
+    if command == 'authorize':
+        authorize()
+    elif command == 'sync':
+        sent, deleted = sync.sync_once()
+        print(f"Sent {sent} events, deleted {deleted}; {len(sync.errors)} failed")
+    else:
+        sys.exit(f"Unknown command: {command}")
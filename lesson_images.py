@@ -0,0 +1,112 @@
+# lesson_images.py
+import os
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from PIL import Image
+from lesson_db import DB_PATH
+
+# Under Streamlit's static folder, so pages can reference images by URL
+# instead of inlining them (needs server.enableStaticServing). Streamlit
+# serves the folder next to its main script, lessons_app/streamlit_app.py;
+# it holds nothing else, unlike the Flask app's static/
+STATIC_DIR = os.path.join('lessons_app', 'static')
+STATIC_URL = 'app/static'
+IMAGE_DIR = os.path.join(STATIC_DIR, 'lessons')
+
+# Responsive widths written for every upload; the largest one is the
+# canonical image stored in lesson_offerings.image_path
+IMAGE_WIDTHS = (200, 400, 800)
+THUMBNAIL_WIDTH = 200
+
+# Module-level state survives Streamlit reruns, so the pool and the job table
+# are shared by every session in the process
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='lesson-images')
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def variant_path(image_path, width, ext='jpg'):
+    """Return the path of the `width` px variant of a stored image"""
+    stem = os.path.splitext(image_path)[0]
+    base, _, suffix = stem.rpartition('_')
+    if not base or not suffix.isdigit():
+        # Legacy images saved before variants existed
+        base = stem
+    return f"{base}_{width}.{ext}"
+
+
+def thumbnail_path(image_path):
+    return variant_path(image_path, THUMBNAIL_WIDTH)
+
+
+def image_url(path):
+    """URL the static file server serves `path` at, or None for images
+    stored outside the static folder before it was used"""
+    relative = os.path.relpath(path, STATIC_DIR)
+    if relative.startswith('..') or os.path.isabs(relative):
+        return None
+    return f"{STATIC_URL}/{relative.replace(os.sep, '/')}"
+
+
+def submit_offering_image(offering_id, image_bytes):
+    """Queue an uploaded image for resizing; returns immediately"""
+    with _jobs_lock:
+        _jobs[offering_id] = {'progress': 0.0, 'error': None}
+    return _executor.submit(_process_offering_image, offering_id, image_bytes)
+
+
+def pending_jobs():
+    """Snapshot of unfinished or failed jobs keyed by offering id"""
+    with _jobs_lock:
+        return {k: dict(v) for k, v in _jobs.items()}
+
+
+def clear_job(offering_id):
+    with _jobs_lock:
+        _jobs.pop(offering_id, None)
+
+
+def _set_progress(offering_id, progress, error=None):
+    with _jobs_lock:
+        if offering_id in _jobs:
+            _jobs[offering_id] = {'progress': progress, 'error': error}
+
+
+def _process_offering_image(offering_id, image_bytes):
+    try:
+        os.makedirs(IMAGE_DIR, exist_ok=True)
+        stem = os.path.join(IMAGE_DIR, str(uuid.uuid4()))
+        with Image.open(BytesIO(image_bytes)) as img:
+            if img.mode in ('RGBA', 'P', 'LA'):
+                img = img.convert('RGB')
+            # Work from the largest size down so each resize starts from a
+            # smaller source image
+            source = img
+            steps = len(IMAGE_WIDTHS) * 2
+            done = 0
+            for width in sorted(IMAGE_WIDTHS, reverse=True):
+                source = source.copy()
+                source.thumbnail((width, width), Image.Resampling.LANCZOS)
+                source.save(f"{stem}_{width}.jpg", format='JPEG', quality=85, optimize=True)
+                done += 1
+                _set_progress(offering_id, done / (steps + 1))
+                source.save(f"{stem}_{width}.webp", format='WEBP', quality=80, method=4)
+                done += 1
+                _set_progress(offering_id, done / (steps + 1))
+
+        image_path = f"{stem}_{max(IMAGE_WIDTHS)}.jpg"
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            conn.execute("UPDATE lesson_offerings SET image_path = ? WHERE id = ?",
+                         (image_path, offering_id))
+            conn.commit()
+        finally:
+            conn.close()
+        clear_job(offering_id)
+        return image_path
+    except Exception as e:
+        _set_progress(offering_id, 1.0, error=str(e))
+        raise
@@ -0,0 +1,157 @@
+# lesson_schedule.py
+import sqlite3
+import threading
+from bisect import bisect_left
+from datetime import datetime, timedelta, time as dtime
+from lesson_db import DB_PATH
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+# Lessons can start on the hour between 8:00 AM and 6:00 PM
+SLOT_TIMES = [dtime(hour) for hour in range(8, 19)]
+DEFAULT_DURATION = 60
+# Bookings in these states don't occupy the calendar
+INACTIVE_STATUSES = ('Cancelled',)
+
+
+class SlotUnavailable(Exception):
+    pass
+
+
+def week_start(day):
+    """Monday of the week containing `day` (a date or datetime)"""
+    if isinstance(day, datetime):
+        day = day.date()
+    return day - timedelta(days=day.weekday())
+
+
+def format_time(t):
+    # "8:00 AM" rather than "08:00 AM", matching the stored preferred_time
+    return datetime.combine(datetime.min, t).strftime("%I:%M %p").lstrip('0')
+
+
+def parse_time(value):
+    return datetime.strptime(value, "%I:%M %p").time()
+
+
+def next_occurrence(day_name, time_str, now=None):
+    """Next datetime falling on `day_name` at `time_str`, today included"""
+    now = now or datetime.now()
+    days_ahead = (DAYS.index(day_name) - now.weekday()) % 7
+    return datetime.combine(now.date() + timedelta(days=days_ahead), parse_time(time_str))
+
+
+class WeekIndex:
+    """Sorted busy intervals for one calendar week"""
+
+    def __init__(self, intervals):
+        intervals = sorted(intervals)
+        self.starts = [start for start, _ in intervals]
+        # Running maximum of end times, so overlapping legacy bookings
+        # can't hide one another
+        self.max_ends = []
+        latest = None
+        for _, end in intervals:
+            latest = end if latest is None or end > latest else latest
+            self.max_ends.append(latest)
+
+    def is_free(self, start, end):
+        # Every interval starting before `end` is to the left of i; the
+        # slot is free if none of them reaches past `start`
+        i = bisect_left(self.starts, end)
+        return i == 0 or self.max_ends[i - 1] <= start
+
+
+class AvailabilityIndex:
+    """In-process cache of busy intervals, built lazily per week.
+
+    The cache only speeds up reads; `book_slot` re-checks for overlaps
+    inside the insert transaction, so a stale cache can at worst offer a
+    slot that is then refused.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._weeks = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._weeks.clear()
+
+    def _week(self, monday):
+        with self._lock:
+            index = self._weeks.get(monday)
+        if index is not None:
+            return index
+        start = datetime.combine(monday, dtime())
+        end = start + timedelta(days=7)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(f"""
+                SELECT starts_at, ends_at FROM lesson_bookings
+                WHERE starts_at < ? AND ends_at > ?
+                AND COALESCE(status, 'Pending') NOT IN ({','.join('?' * len(INACTIVE_STATUSES))})
+            """, (end.isoformat(), start.isoformat(), *INACTIVE_STATUSES)).fetchall()
+        finally:
+            conn.close()
+        index = WeekIndex((datetime.fromisoformat(s), datetime.fromisoformat(e)) for s, e in rows)
+        with self._lock:
+            self._weeks[monday] = index
+        return index
+
+    def available_slots(self, duration_minutes, week, now=None):
+        """Start datetimes in `week` where a lesson of this length fits"""
+        now = now or datetime.now()
+        monday = week_start(week)
+        index = self._week(monday)
+        length = timedelta(minutes=duration_minutes or DEFAULT_DURATION)
+        slots = []
+        for offset in range(7):
+            day = monday + timedelta(days=offset)
+            for slot_time in SLOT_TIMES:
+                start = datetime.combine(day, slot_time)
+                if start > now and index.is_free(start, start + length):
+                    slots.append(start)
+        return slots
+
+
+def book_slot(lesson_id, student_name, student_email, starts_at, duration_minutes,
+              musical_goals, db_path=DB_PATH):
+    """Insert a booking, refusing it if it overlaps an active booking.
+
+    The overlap check and the insert run in one IMMEDIATE transaction, so
+    two concurrent submissions for the same slot can't both succeed.
+    """
+    ends_at = starts_at + timedelta(minutes=duration_minutes or DEFAULT_DURATION)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            clash = conn.execute(f"""
+                SELECT 1 FROM lesson_bookings
+                WHERE starts_at < ? AND ends_at > ?
+                AND COALESCE(status, 'Pending') NOT IN ({','.join('?' * len(INACTIVE_STATUSES))})
+                LIMIT 1
+            """, (ends_at.isoformat(), starts_at.isoformat(), *INACTIVE_STATUSES)).fetchone()
+            if clash:
+                raise SlotUnavailable(f"{starts_at:%A %b %d, %I:%M %p} is already booked")
+            cur = conn.execute("""
+                INSERT INTO lesson_bookings
+                (lesson_id, student_name, student_email, preferred_day, preferred_time,
+                 musical_goals, starts_at, ends_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (lesson_id, student_name, student_email, DAYS[starts_at.weekday()],
+                  format_time(starts_at.time()), musical_goals,
+                  starts_at.isoformat(), ends_at.isoformat()))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    availability.invalidate()
+    return cur.lastrowid
+
+
+# Shared by all sessions in the process
+availability = AvailabilityIndex()
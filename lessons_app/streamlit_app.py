@@ -0,0 +1,20 @@
+# lessons_app/streamlit_app.py
+"""Streamlit entry point for the lessons site.
+
+    streamlit run lessons_app/streamlit_app.py
+
+Streamlit serves the static/ folder next to the main script to anyone,
+so the app starts from here rather than from the repository root. That
+way only lessons_app/static, which holds nothing but lesson images, is
+exposed, and not the Flask app's static/ tree with its purchase-only
+uploads.
+"""
+import os
+import runpy
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+runpy.run_path(os.path.join(ROOT, 'appp.py'), run_name='__main__')
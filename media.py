@@ -0,0 +1,26 @@
+# media.py
+from flask import Blueprint, abort, current_app, send_from_directory, redirect, url_for
+from flask_login import current_user, login_required
+
+from storage import media_url
+from utils import can_watch
+
+bp = Blueprint('media', __name__)
+
+def video_src(filename):
+    """URL for a stored video: signed and direct when the backend supports it"""
+    if not (current_user.is_authenticated and can_watch(current_user.id, filename)):
+        return None
+    return media_url(filename) or url_for('media.uploaded_file', filename=filename)
+
+@bp.route("/uploads/<filename>")
+@login_required
+def uploaded_file(filename):
+    # Signed URLs and the files themselves go to buyers and the uploader only
+    if not can_watch(current_user.id, filename):
+        abort(403)
+    # Remote backends serve the bytes themselves
+    url = media_url(filename)
+    if url:
+        return redirect(url)
+    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
@@ -0,0 +1,31 @@
+"""video neighbors
+
+Revision ID: 0053d534a935
+Revises: 2d1eea782221
+Create Date: 2026-10-19 20:16:22.536972
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0053d534a935'
+down_revision = '2d1eea782221'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Filled by the recommender's next run, or `flask build-recommendations`
+    op.create_table('video_neighbor',
+        sa.Column('video_id', sa.Integer(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('neighbor_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('video_id', 'rank')
+    )
+
+
+def downgrade():
+    op.drop_table('video_neighbor')
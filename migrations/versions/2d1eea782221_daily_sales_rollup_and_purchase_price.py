@@ -0,0 +1,47 @@
+"""daily sales rollup and purchase price
+
+Revision ID: 2d1eea782221
+Revises: 58b11987fc0c
+Create Date: 2026-10-19 20:16:21.542278
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d1eea782221'
+down_revision = '58b11987fc0c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # What older purchases paid wasn't recorded; the current price is the
+    # best estimate, as in `flask rebuild-sales`
+    with op.batch_alter_table('purchase', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('price', sa.Float(), nullable=True))
+    op.execute("""
+        UPDATE purchase SET price = (SELECT video.price FROM video WHERE video.id = purchase.video_id)
+        WHERE price IS NULL
+    """)
+
+    op.create_table('daily_sales',
+        sa.Column('video_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('video_id', 'day')
+    )
+    op.execute("""
+        INSERT INTO daily_sales (video_id, day, count, revenue)
+        SELECT video_id, date(date_purchased), COUNT(*), COALESCE(SUM(price), 0)
+        FROM purchase
+        GROUP BY video_id, date(date_purchased)
+    """)
+
+
+def downgrade():
+    op.drop_table('daily_sales')
+    with op.batch_alter_table('purchase', schema=None) as batch_op:
+        batch_op.drop_column('price')
@@ -0,0 +1,49 @@
+"""media probe fields
+
+Revision ID: 4de7c7147003
+Revises: 0053d534a935
+Create Date: 2026-10-19 20:16:23.576319
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4de7c7147003'
+down_revision = '0053d534a935'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing uploads are already live, so they are re-probed rather than
+    # treated as new: the prober's next sweep fills in their metadata
+    # without hiding them or deleting any it can't read
+    with op.batch_alter_table('video', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('probe_status', sa.String(length=10), nullable=False,
+                                      server_default='pending'))
+        batch_op.add_column(sa.Column('duration', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('width', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('height', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('video_codec', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('bitrate', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_video_probe_status'), ['probe_status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_video_duration'), ['duration'], unique=False)
+        batch_op.create_index(batch_op.f('ix_video_height'), ['height'], unique=False)
+        batch_op.create_index(batch_op.f('ix_video_price'), ['price'], unique=False)
+    op.execute("UPDATE video SET probe_status = 'reprobe'")
+
+
+def downgrade():
+    with op.batch_alter_table('video', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_video_price'))
+        batch_op.drop_index(batch_op.f('ix_video_height'))
+        batch_op.drop_index(batch_op.f('ix_video_duration'))
+        batch_op.drop_index(batch_op.f('ix_video_probe_status'))
+        batch_op.drop_column('bitrate')
+        batch_op.drop_column('video_codec')
+        batch_op.drop_column('height')
+        batch_op.drop_column('width')
+        batch_op.drop_column('duration')
+        batch_op.drop_column('probe_status')
@@ -0,0 +1,64 @@
+"""watch events and view rollups
+
+Revision ID: 58b11987fc0c
+Revises: a5bb89d93f0a
+Create Date: 2026-10-19 20:14:43.742164
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '58b11987fc0c'
+down_revision = 'a5bb89d93f0a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('watch_event',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('video_id', sa.Integer(), nullable=False),
+        sa.Column('play_id', sa.String(length=32), nullable=False),
+        sa.Column('kind', sa.String(length=10), nullable=False),
+        sa.Column('position', sa.Float(), nullable=False),
+        sa.Column('duration', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('watch_event', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_watch_event_video_id'), ['video_id'], unique=False)
+
+    op.create_table('watch_session',
+        sa.Column('video_id', sa.Integer(), nullable=False),
+        sa.Column('play_id', sa.String(length=32), nullable=False),
+        sa.Column('max_fraction', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('video_id', 'play_id')
+    )
+    op.create_table('rollup_state',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('last_id', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+    # Existing videos start unwatched; the rollups fill these in
+    with op.batch_alter_table('video', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('view_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('avg_watch_pct', sa.Float(), nullable=False, server_default='0'))
+        batch_op.create_index(batch_op.f('ix_video_view_count'), ['view_count'], unique=False)
+        batch_op.create_index(batch_op.f('ix_video_avg_watch_pct'), ['avg_watch_pct'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('video', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_video_avg_watch_pct'))
+        batch_op.drop_index(batch_op.f('ix_video_view_count'))
+        batch_op.drop_column('avg_watch_pct')
+        batch_op.drop_column('view_count')
+
+    op.drop_table('rollup_state')
+    op.drop_table('watch_session')
+    with op.batch_alter_table('watch_event', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_watch_event_video_id'))
+    op.drop_table('watch_event')
@@ -0,0 +1,87 @@
+"""baseline schema
+
+The tables as db.create_all() made them before migrations existed. Tables
+that already exist are left alone, so those databases can be upgraded
+without stamping them first.
+
+Revision ID: 6b8dcf1515c1
+Revises: 
+Create Date: 2026-10-19 20:14:10.958078
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b8dcf1515c1'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'user' not in existing:
+        op.create_table('user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(length=20), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('image_file', sa.String(length=20), nullable=False),
+            sa.Column('bio', sa.Text(), nullable=True),
+            sa.Column('password', sa.String(length=60), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+            sa.UniqueConstraint('username')
+        )
+    if 'video' not in existing:
+        op.create_table('video',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=100), nullable=False),
+            sa.Column('date_posted', sa.DateTime(), nullable=False),
+            sa.Column('filename', sa.String(length=100), nullable=False),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'comment' not in existing:
+        op.create_table('comment',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('content', sa.Text(), nullable=False),
+            sa.Column('date_commented', sa.DateTime(), nullable=False),
+            sa.Column('video_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.ForeignKeyConstraint(['video_id'], ['video.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'rating' not in existing:
+        op.create_table('rating',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('score', sa.Integer(), nullable=False),
+            sa.Column('date_rated', sa.DateTime(), nullable=False),
+            sa.Column('video_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.ForeignKeyConstraint(['video_id'], ['video.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+    if 'purchase' not in existing:
+        op.create_table('purchase',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('video_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('date_purchased', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.ForeignKeyConstraint(['video_id'], ['video.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('purchase')
+    op.drop_table('rating')
+    op.drop_table('comment')
+    op.drop_table('video')
+    op.drop_table('user')
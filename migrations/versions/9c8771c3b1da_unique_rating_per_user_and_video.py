@@ -0,0 +1,36 @@
+"""unique rating per user and video
+
+Revision ID: 9c8771c3b1da
+Revises: bffc3d24fc9d
+Create Date: 2026-10-19 20:16:26.094242
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c8771c3b1da'
+down_revision = 'bffc3d24fc9d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep only each user's latest rating of a video, or the index can't
+    # be built
+    op.execute("""
+        DELETE FROM rating WHERE EXISTS (
+            SELECT 1 FROM rating newer
+            WHERE newer.video_id = rating.video_id AND newer.user_id = rating.user_id
+            AND (newer.date_rated > rating.date_rated
+                 OR (newer.date_rated = rating.date_rated AND newer.id > rating.id))
+        )
+    """)
+    with op.batch_alter_table('rating', schema=None) as batch_op:
+        batch_op.create_index('ix_rating_video_id_user_id', ['video_id', 'user_id'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('rating', schema=None) as batch_op:
+        batch_op.drop_index('ix_rating_video_id_user_id')
@@ -0,0 +1,28 @@
+"""soft delete videos
+
+Revision ID: a5bb89d93f0a
+Revises: 6b8dcf1515c1
+Create Date: 2026-10-19 20:14:12.011516
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5bb89d93f0a'
+down_revision = '6b8dcf1515c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('video', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_video_deleted_at'), ['deleted_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('video', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_video_deleted_at'))
+        batch_op.drop_column('deleted_at')
@@ -0,0 +1,47 @@
+"""bus events and stored sessions
+
+Revision ID: bffc3d24fc9d
+Revises: d75da86012d5
+Create Date: 2026-10-19 20:16:25.383454
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bffc3d24fc9d'
+down_revision = 'd75da86012d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('bus_event',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('topic', sa.String(length=50), nullable=False),
+        sa.Column('key', sa.String(length=100), nullable=False),
+        sa.Column('origin', sa.String(length=32), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('bus_event', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_bus_event_created_at'), ['created_at'], unique=False)
+
+    op.create_table('stored_session',
+        sa.Column('id', sa.String(length=64), nullable=False),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('stored_session', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_stored_session_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('stored_session', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_stored_session_expires_at'))
+    op.drop_table('stored_session')
+    with op.batch_alter_table('bus_event', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_bus_event_created_at'))
+    op.drop_table('bus_event')
@@ -0,0 +1,27 @@
+"""index video filename
+
+Revision ID: cedad58700ec
+Revises: 9c8771c3b1da
+Create Date: 2026-10-19 20:38:40.905437
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cedad58700ec'
+down_revision = '9c8771c3b1da'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Media requests look up which videos use a storage key
+    with op.batch_alter_table('video', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_video_filename'), ['filename'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('video', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_video_filename'))
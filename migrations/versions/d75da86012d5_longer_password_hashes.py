@@ -0,0 +1,29 @@
+"""longer password hashes
+
+Revision ID: d75da86012d5
+Revises: 4de7c7147003
+Create Date: 2026-10-19 20:16:24.642587
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd75da86012d5'
+down_revision = '4de7c7147003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Werkzeug hashes (method$salt$hash) don't fit in 60 characters
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password', existing_type=sa.String(length=60),
+                              type_=sa.String(length=255), existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password', existing_type=sa.String(length=255),
+                              type_=sa.String(length=60), existing_nullable=False)
@@ -13,7 +13,7 @@ class User(db.Model, UserMixin):
     email = db.Column(db.String(120), unique=True, nullable=False)
     image_file = db.Column(db.String(20), nullable=False, default='default.jpg')  # Profile Picture
     bio = db.Column(db.Text, nullable=True)  # User Bio
-    password = db.Column(db.String(60), nullable=False)
+    password = db.Column(db.String(255), nullable=False)  # Werkzeug hash, method$salt$hash
     videos = db.relationship('Video', backref='uploader', lazy=True)
     comments = db.relationship('Comment', backref='author', lazy=True)
     ratings = db.relationship('Rating', backref='rater', lazy=True)
@@ -26,13 +26,32 @@ class Video(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     date_posted = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-    filename = db.Column(db.String(100), nullable=False)
-    price = db.Column(db.Float, nullable=False, default=50.0)  # Price in USD
+    filename = db.Column(db.String(100), nullable=False, index=True)  # Storage key; shared by identical uploads
+    price = db.Column(db.Float, nullable=False, default=50.0, index=True)  # Price in USD
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=True, index=True)  # Set on delete; purged by the reaper
+    view_count = db.Column(db.Integer, nullable=False, default=0, index=True)  # Maintained by event rollups
+    avg_watch_pct = db.Column(db.Float, nullable=False, default=0.0, index=True)  # 0-100, maintained by event rollups
+    # Filled in by the media prober after upload
+    probe_status = db.Column(db.String(10), nullable=False, default='pending', index=True)  # pending, reprobe, ok or failed
+    duration = db.Column(db.Float, nullable=True, index=True)  # Seconds
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True, index=True)
+    video_codec = db.Column(db.String(20), nullable=True)
+    bitrate = db.Column(db.Integer, nullable=True)  # Bits per second
     comments = db.relationship('Comment', backref='video', lazy=True)
     ratings = db.relationship('Rating', backref='video', lazy=True)
     purchases = db.relationship('Purchase', backref='video', lazy=True)
 
+    @classmethod
+    def active(cls):
+        """Query for videos that have not been deleted"""
+        return cls.query.filter(cls.deleted_at.is_(None))
+
+    @classmethod
+    def get_active_or_404(cls, video_id):
+        return cls.active().filter(cls.id == video_id).first_or_404()
+
     def __repr__(self):
         return f"Video('{self.title}', '{self.filename}', '{self.price}')"
 
@@ -52,6 +71,8 @@ class Rating(db.Model):
     date_rated = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     video_id = db.Column(db.Integer, db.ForeignKey('video.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # One rating per user and video; target of the rating upsert
+    __table_args__ = (db.Index('ix_rating_video_id_user_id', 'video_id', 'user_id', unique=True),)
 
     def __repr__(self):
         return f"Rating('{self.score}', '{self.date_rated}')"
@@ -61,6 +82,56 @@ class Purchase(db.Model):
     video_id = db.Column(db.Integer, db.ForeignKey('video.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     date_purchased = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    price = db.Column(db.Float, nullable=True)  # USD actually paid; may differ from the current Video.price
 
     def __repr__(self):
-        return f"Purchase(User ID: {self.user_id}, Video ID: {self.video_id})"
\ No newline at end of file
+        return f"Purchase(User ID: {self.user_id}, Video ID: {self.video_id})"
+
+class DailySales(db.Model):
+    # Maintained incrementally as purchases are recorded
+    video_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+class VideoNeighbor(db.Model):
+    # Top-K "students also bought" list per video, rebuilt by recommendations.py
+    video_id = db.Column(db.Integer, primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)
+    neighbor_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)  # Cosine similarity of purchase vectors
+
+class WatchEvent(db.Model):
+    # Append-only; written in batches by the event flusher
+    id = db.Column(db.Integer, primary_key=True)
+    video_id = db.Column(db.Integer, nullable=False, index=True)
+    play_id = db.Column(db.String(32), nullable=False)  # One per page load of the player
+    kind = db.Column(db.String(10), nullable=False)  # view, progress or ended
+    position = db.Column(db.Float, nullable=False, default=0.0)  # Seconds
+    duration = db.Column(db.Float, nullable=True)  # Seconds
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class WatchSession(db.Model):
+    # Furthest point reached per play, folded in from WatchEvent by rollups
+    video_id = db.Column(db.Integer, primary_key=True)
+    play_id = db.Column(db.String(32), primary_key=True)
+    max_fraction = db.Column(db.Float, nullable=False, default=0.0)
+
+class BusEvent(db.Model):
+    # Invalidation messages for the database-polling bus; pruned after a while
+    id = db.Column(db.Integer, primary_key=True)
+    topic = db.Column(db.String(50), nullable=False)
+    key = db.Column(db.String(100), nullable=False)
+    origin = db.Column(db.String(32), nullable=False)  # Publishing process, which skips its own events
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+class StoredSession(db.Model):
+    # Server-side session data for SESSION_BACKEND=database
+    id = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class RollupState(db.Model):
+    # High-water mark of the last event included in a rollup
+    name = db.Column(db.String(50), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
\ No newline at end of file
@@ -0,0 +1,120 @@
+# passwords.py
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashPoolBusy(Exception):
+    """Too many password hashes are already queued"""
+
+
+class HashPool:
+    """Runs password hashing on a few worker threads.
+
+    hashlib releases the GIL while deriving keys, so request threads only
+    wait here instead of each burning a core. Once `max_pending` hashes are
+    queued or running, new ones are refused straight away.
+    """
+
+    def __init__(self, workers=4, max_pending=32):
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='password-hash') if workers else None
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def run(self, func, *args):
+        if self._executor is None:
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashPoolBusy()
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+
+class TokenBucket:
+    """Per-key token buckets holding up to `capacity` attempts.
+
+    Buckets refill at `per_minute` tokens a minute. Only the most recently
+    used `max_keys` buckets are kept. State is per process, so with several
+    workers the effective limit is multiplied by the worker count.
+    """
+
+    def __init__(self, per_minute, capacity=None, max_keys=100000):
+        self.rate = per_minute / 60
+        self.capacity = capacity or per_minute
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, last refill)
+        self._lock = threading.Lock()
+
+    def allow(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed
+
+
+class PasswordHasher:
+    """Hashes and checks passwords with the configured method off-thread"""
+
+    def __init__(self, method, pool):
+        self.method = method
+        self.pool = pool
+        self._dummy_hash = None
+        self._prefix = None
+
+    def hash(self, password):
+        return self.pool.run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        """Check `password`; a missing account costs as much as a wrong password"""
+        if stored_hash is None:
+            # Keep response times from revealing which emails are registered
+            self.pool.run(check_password_hash, self._get_dummy_hash(), password)
+            return False
+        return self.pool.run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        # Werkzeug hashes look like "method$salt$hash", with the method
+        # spelled out in full ("scrypt" becomes "scrypt:32768:8:1"), so
+        # compare against a hash it made rather than the configured name
+        if self._prefix is None:
+            self._prefix = self._get_dummy_hash().split('$', 1)[0]
+        return stored_hash.split('$', 1)[0] != self._prefix
+
+    def _get_dummy_hash(self):
+        # Made on first use, not at startup, since hashing is slow on purpose
+        if self._dummy_hash is None:
+            self._dummy_hash = generate_password_hash('dummy password', self.method)
+        return self._dummy_hash
+
+
+def init_passwords(app):
+    """Attach the password hasher and login limiters to the app"""
+    pool = HashPool(app.config.get('PASSWORD_HASH_WORKERS', 4),
+                    app.config.get('PASSWORD_HASH_QUEUE', 32))
+    app.extensions['password_hasher'] = PasswordHasher(
+        app.config.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000'), pool)
+    limits = (app.config.get('LOGIN_IP_LIMIT', 10), app.config.get('LOGIN_ACCOUNT_LIMIT', 5))
+    app.extensions['login_limiters'] = tuple(TokenBucket(limit) if limit else None
+                                             for limit in limits)
+
+
+def get_hasher():
+    return current_app.extensions['password_hasher']
+
+
+def login_allowed(ip, email):
+    """Take a token from the IP's and the account's bucket, before any hashing"""
+    by_ip, by_account = current_app.extensions['login_limiters']
+    if by_ip and not by_ip.allow(ip):
+        return False
+    if by_account and not by_account.allow(email.strip().lower()):
+        return False
+    return True
@@ -0,0 +1,120 @@
+# payments.py
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, jsonify, current_app
+from flask_login import current_user, login_required
+
+from models import User, Video
+from sales import record_purchase
+from utils import has_purchased
+
+bp = Blueprint('payments', __name__)
+
+def get_stripe():
+    """Import and configure Stripe on first use"""
+    import stripe
+    stripe.api_key = current_app.config['STRIPE_SECRET_KEY']
+    return stripe
+
+def checkout_params(video, customer_email):
+    """Stripe Checkout Session arguments for buying `video`"""
+    return dict(
+        payment_method_types=['card'],
+        customer_email=customer_email,
+        line_items=[{
+            'price_data': {
+                'currency': 'usd',
+                'product_data': {
+                    'name': video.title,
+                },
+                'unit_amount': int(video.price * 100),  # Convert to cents
+            },
+            'quantity': 1,
+        }],
+        mode='payment',
+        success_url=url_for('payments.payment_success', video_id=video.id, _external=True) + '?session_id={CHECKOUT_SESSION_ID}',
+        cancel_url=url_for('payments.payment_cancel', video_id=video.id, _external=True),
+    )
+
+@bp.route("/purchase/<int:video_id>", methods=['GET', 'POST'])
+@login_required
+def purchase_video(video_id):
+    video = Video.get_active_or_404(video_id)
+    if has_purchased(current_user.id, video_id):
+        flash('You have already purchased this video.', 'info')
+        return redirect(url_for('catalog.video_detail', video_id=video.id))
+    
+    if request.method == 'POST':
+        try:
+            stripe = get_stripe()
+            checkout_session = stripe.checkout.Session.create(**checkout_params(video, current_user.email))
+            return redirect(checkout_session.url, code=303)
+        except Exception as e:
+            flash('An error occurred while processing your payment.', 'danger')
+            return redirect(url_for('catalog.video_detail', video_id=video.id))
+    else:
+        return render_template('purchase_video.html', video=video, 
+                             stripe_public_key=current_app.config['STRIPE_PUBLIC_KEY'])
+
+@bp.route("/payment_success/<int:video_id>")
+@login_required
+def payment_success(video_id):
+    session_id = request.args.get('session_id')
+    if not session_id:
+        abort(400)
+
+    try:
+        session = get_stripe().checkout.Session.retrieve(session_id)
+        if session.payment_status == 'paid':
+            if not has_purchased(current_user.id, video_id):
+                video = Video.query.get_or_404(video_id)
+                # Record what Stripe actually charged, in dollars
+                record_purchase(current_user.id, video, amount_paid(session))
+            flash('Payment successful! You now have access to this video.', 'success')
+            return redirect(url_for('catalog.video_detail', video_id=video_id))
+        else:
+            flash('Payment was not successful.', 'danger')
+            return redirect(url_for('catalog.video_detail', video_id=video_id))
+    except Exception as e:
+        flash('An error occurred while verifying your payment.', 'danger')
+        return redirect(url_for('catalog.video_detail', video_id=video_id))
+
+@bp.route("/payment_cancel/<int:video_id>")
+def payment_cancel(video_id):
+    flash('Payment was canceled.', 'info')
+    return redirect(url_for('catalog.video_detail', video_id=video_id))
+
+@bp.route("/stripe_webhook", methods=['POST'])
+def stripe_webhook():
+    stripe = get_stripe()
+    payload = request.get_data(as_text=True)
+    sig_header = request.headers.get('Stripe-Signature')
+    endpoint_secret = current_app.config['STRIPE_WEBHOOK_SECRET']
+
+    try:
+        event = stripe.Webhook.construct_event(
+            payload, sig_header, endpoint_secret
+        )
+    except ValueError:
+        return 'Invalid payload', 400
+    except stripe.error.SignatureVerificationError:
+        return 'Invalid signature', 400
+
+    if event['type'] == 'checkout.session.completed':
+        session = event['data']['object']
+        handle_checkout_session(session)
+
+    return jsonify(success=True), 200
+
+def amount_paid(session):
+    """Dollars Stripe actually charged, or None if the session doesn't say"""
+    amount = getattr(session, 'amount_total', None)
+    return amount / 100 if amount is not None else None
+
+def handle_checkout_session(session):
+    # Stripe objects aren't dicts; missing fields raise AttributeError
+    customer_email = getattr(session, 'customer_email', None)
+    video_title = session['display_items'][0]['custom']['name']
+    user = User.query.filter_by(email=customer_email).first()
+    video = Video.active().filter_by(title=video_title).first()
+    if user and video:
+        if not has_purchased(user.id, video.id):
+            record_purchase(user.id, video, amount_paid(session))
@@ -0,0 +1,162 @@
+# probe.py
+import json
+import shutil
+import subprocess
+import threading
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from extensions import db
+from models import Video
+from storage import get_storage
+
+BATCH_SIZE = 20
+MEDIA_FIELDS = ('duration', 'width', 'height', 'video_codec', 'bitrate')  # Filled from probe_media()
+URL_TTL = 600  # Long enough for ffprobe to read the headers of a remote file
+
+# Set by uploads so the worker doesn't wait out its full interval
+probe_requested = threading.Event()
+
+
+class ProbeError(Exception):
+    """The file could not be read as a video"""
+
+
+def probe_media(source, ffprobe='ffprobe', timeout=30):
+    """Duration, resolution, codec and bitrate of a local path or URL"""
+    try:
+        result = subprocess.run(
+            [ffprobe, '-v', 'error', '-print_format', 'json',
+             '-show_format', '-show_streams', source],
+            capture_output=True, timeout=timeout, check=False,
+        )
+    except subprocess.TimeoutExpired:
+        raise ProbeError('ffprobe timed out')
+    if result.returncode != 0:
+        raise ProbeError(result.stderr.decode('utf-8', 'replace').strip() or 'ffprobe failed')
+
+    info = json.loads(result.stdout or b'{}')
+    stream = next((s for s in info.get('streams', []) if s.get('codec_type') == 'video'), None)
+    fmt = info.get('format', {})
+    if stream is None:
+        raise ProbeError('no video stream')
+    try:
+        duration = float(fmt.get('duration') or stream.get('duration'))
+    except (TypeError, ValueError):
+        raise ProbeError('unknown duration')
+    bitrate = fmt.get('bit_rate') or stream.get('bit_rate')
+    return {
+        'duration': duration,
+        'width': int(stream.get('width') or 0) or None,
+        'height': int(stream.get('height') or 0) or None,
+        'video_codec': stream.get('codec_name'),
+        'bitrate': int(bitrate) if bitrate else None,
+    }
+
+
+def _probe_source(key):
+    # ffprobe reads local files directly and anything else over HTTP
+    storage = get_storage()
+    origin = getattr(storage, 'origin', storage)
+    if hasattr(origin, 'path'):
+        return origin.path(key)
+    return storage.url(key, expires_in=URL_TTL)
+
+
+def probe_pending(batch_size=BATCH_SIZE):
+    """Probe videos awaiting metadata; returns the number handled.
+
+    New uploads ffprobe can't read are soft-deleted, so the reaper removes
+    them and they never reach the catalog. Videos already live are only
+    marked failed; their purchases and comments must survive a bad probe.
+    """
+    ffprobe = current_app.config.get('FFPROBE_PATH', 'ffprobe')
+    if not shutil.which(ffprobe):
+        current_app.logger.warning('%s not found; uploads stay unprobed', ffprobe)
+        return 0
+    timeout = current_app.config.get('PROBE_TIMEOUT', 30)
+
+    videos = (Video.active().filter(Video.probe_status.in_(('pending', 'reprobe')))
+              .order_by(Video.id).limit(batch_size).all())
+    for video in videos:
+        try:
+            metadata = probe_media(_probe_source(video.filename), ffprobe, timeout)
+        except ProbeError as e:
+            if video.probe_status == 'pending':
+                current_app.logger.warning('Rejecting video %s: %s', video.id, e)
+                video.deleted_at = datetime.utcnow()
+            else:
+                current_app.logger.error('Cannot probe live video %s: %s', video.id, e)
+            video.probe_status = 'failed'
+        else:
+            apply_probe(video, metadata)
+        db.session.commit()
+    return len(videos)
+
+
+def probe_file(key):
+    """Metadata of a stored file, probed now; None if ffprobe is missing"""
+    ffprobe = current_app.config.get('FFPROBE_PATH', 'ffprobe')
+    if not shutil.which(ffprobe):
+        return None
+    return probe_media(_probe_source(key), ffprobe, current_app.config.get('PROBE_TIMEOUT', 30))
+
+
+def apply_probe(video, metadata):
+    for name, value in metadata.items():
+        setattr(video, name, value)
+    video.probe_status = 'ok'
+
+
+def reset_probe(video):
+    """Forget a live video's media metadata; it stays listed until re-probed"""
+    video.probe_status = 'reprobe'
+    for name in MEDIA_FIELDS:
+        setattr(video, name, None)
+
+
+def request_probe():
+    probe_requested.set()
+
+
+def start_prober(app):
+    """Probe new uploads on a daemon thread"""
+    interval = app.config.get('PROBE_INTERVAL', 30)
+
+    def run():
+        while True:
+            probe_requested.wait(interval)
+            probe_requested.clear()
+            with app.app_context():
+                try:
+                    # Keep going while full batches come back
+                    while probe_pending() == BATCH_SIZE:
+                        pass
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Media probe failed')
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=run, name='media-prober', daemon=True)
+    thread.start()
+    return thread
+
+
+@click.command('probe-media')
+@click.option('--all', 'reprobe', is_flag=True, help='Re-probe videos that already have metadata.')
+@with_appcontext
+def probe_media_command(reprobe):
+    """Record duration, resolution, codec and bitrate of uploaded videos."""
+    if reprobe:
+        Video.active().update({Video.probe_status: 'reprobe'}, synchronize_session=False)
+        db.session.commit()
+    total = 0
+    while True:
+        probed = probe_pending()
+        if not probed:
+            break
+        total += probed
+    click.echo(f"Probed {total} videos")
@@ -0,0 +1,89 @@
+# profiling.py
+import threading
+import time
+from flask import before_render_template, template_rendered, g
+from jinja2 import Template
+
+
+class RenderStats:
+    """Thread-safe counters of render time per template and per block"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = {}  # name -> [count, total seconds, max seconds]
+
+    def record(self, name, seconds):
+        with self._lock:
+            entry = self.timings.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def reset(self):
+        with self._lock:
+            self.timings.clear()
+
+    def report(self, top=None):
+        """Rows of (name, count, total ms, mean ms, max ms), slowest first"""
+        with self._lock:
+            rows = [(name, count, total * 1000, total * 1000 / count, worst * 1000)
+                    for name, (count, total, worst) in self.timings.items()]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:top] if top else rows
+
+
+render_stats = RenderStats()
+
+
+def _timed_block(func, label):
+    # Block functions are generators; time covers everything the block
+    # renders, including nested blocks and includes
+    def block(context):
+        start = time.perf_counter()
+        try:
+            yield from func(context)
+        finally:
+            render_stats.record(label, time.perf_counter() - start)
+    return block
+
+
+class ProfiledTemplate(Template):
+    """Template whose blocks report their render time to `render_stats`"""
+
+    @classmethod
+    def _from_namespace(cls, environment, namespace, globals):
+        template = super()._from_namespace(environment, namespace, globals)
+        template.blocks = {
+            name: _timed_block(func, f"{template.name}:{name}")
+            for name, func in template.blocks.items()
+        }
+        return template
+
+
+def _render_started(sender, template, context, **extra):
+    g.setdefault('_render_starts', []).append(time.perf_counter())
+
+
+def _render_finished(sender, template, context, **extra):
+    elapsed = time.perf_counter() - g._render_starts.pop()
+    render_stats.record(template.name, elapsed)
+    g.setdefault('_render_timings', []).append((template.name, elapsed))
+
+
+def _add_server_timing(response):
+    # Expose this request's template timings to browser dev tools
+    timings = g.pop('_render_timings', None)
+    if timings:
+        entries = [f'tpl{i};desc="{name}";dur={elapsed * 1000:.2f}'
+                   for i, (name, elapsed) in enumerate(timings)]
+        response.headers.add('Server-Timing', ', '.join(entries))
+    return response
+
+
+def init_render_profiling(app):
+    """Record per-template and per-block render times for this app"""
+    # Must be set before any template is loaded
+    app.jinja_env.template_class = ProfiledTemplate
+    before_render_template.connect(_render_started, app)
+    template_rendered.connect(_render_finished, app)
+    app.after_request(_add_server_timing)
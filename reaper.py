@@ -0,0 +1,116 @@
+# reaper.py
+import os
+import threading
+import time
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from extensions import db
+from models import User, Video, Comment, Rating, Purchase, DailySales, VideoNeighbor
+from storage import get_storage
+
+BATCH_SIZE = 500
+# Files younger than this may belong to an upload whose row isn't committed yet
+ORPHAN_GRACE_SECONDS = 3600
+DEFAULT_PICTURE = 'default.jpg'
+
+
+def _delete_in_batches(model, video_id, batch_size):
+    """Delete a video's rows from `model` a batch at a time"""
+    while True:
+        ids = [row.id for row in model.query.with_entities(model.id)
+               .filter_by(video_id=video_id).limit(batch_size)]
+        if not ids:
+            return
+        model.query.filter(model.id.in_(ids)).delete(synchronize_session=False)
+        # Commit each batch so writers are never blocked for long
+        db.session.commit()
+
+
+def reap_deleted_videos(batch_size=BATCH_SIZE):
+    """Purge soft-deleted videos, their related rows and their media"""
+    reaped = 0
+    storage = get_storage()
+    for video in Video.query.filter(Video.deleted_at.isnot(None)).limit(batch_size).all():
+        for model in (Comment, Rating, Purchase):
+            _delete_in_batches(model, video.id, batch_size)
+        # At most one rollup row per day, small enough to drop at once
+        DailySales.query.filter_by(video_id=video.id).delete()
+        VideoNeighbor.query.filter(db.or_(VideoNeighbor.video_id == video.id,
+                                          VideoNeighbor.neighbor_id == video.id)).delete()
+        key = video.filename
+        db.session.delete(video)
+        db.session.commit()
+        # Content-addressed keys can be shared by several videos
+        if not Video.query.filter_by(filename=key).first():
+            storage.delete(key)
+        reaped += 1
+    return reaped
+
+
+def collect_orphans(grace_seconds=ORPHAN_GRACE_SECONDS):
+    """Remove stored videos and profile pictures no row refers to"""
+    cutoff = time.time() - grace_seconds
+    removed = 0
+
+    storage = get_storage()
+    referenced = {filename for (filename,) in db.session.query(Video.filename)}
+    for key, modified in list(storage.keys()):
+        if key not in referenced and modified < cutoff:
+            storage.delete(key)
+            removed += 1
+
+    pictures_dir = os.path.join(current_app.root_path, 'static', 'profile_pics')
+    referenced = {image for (image,) in db.session.query(User.image_file)}
+    referenced.add(DEFAULT_PICTURE)
+    if os.path.isdir(pictures_dir):
+        with os.scandir(pictures_dir) as entries:
+            for entry in entries:
+                if (entry.is_file() and entry.name not in referenced
+                        and entry.stat().st_mtime < cutoff):
+                    os.remove(entry.path)
+                    removed += 1
+    return removed
+
+
+def start_reaper(app):
+    """Run the reaper and orphan collector on a daemon thread"""
+    interval = app.config.get('REAPER_INTERVAL', 60)
+    orphan_interval = app.config.get('ORPHAN_SCAN_INTERVAL', 3600)
+
+    def run():
+        last_scan = 0
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    reap_deleted_videos()
+                    if time.time() - last_scan >= orphan_interval:
+                        collect_orphans()
+                        last_scan = time.time()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Media reaper failed')
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=run, name='media-reaper', daemon=True)
+    thread.start()
+    return thread
+
+
+@click.command('reap')
+@click.option('--orphans/--no-orphans', default=True, help='Also remove unreferenced files.')
+@with_appcontext
+def reap_command(orphans):
+    """Purge deleted videos now (for cron instead of the background thread)."""
+    total = 0
+    while True:
+        reaped = reap_deleted_videos()
+        if not reaped:
+            break
+        total += reaped
+    click.echo(f"Reaped {total} deleted videos")
+    if orphans:
+        click.echo(f"Removed {collect_orphans()} orphaned files")
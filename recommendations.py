@@ -0,0 +1,143 @@
+# recommendations.py
+import threading
+import time
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert
+
+from extensions import db
+from models import Video, Purchase, VideoNeighbor, RollupState
+
+STATE_NAME = 'recommendations'
+COLUMN_BATCH = 1000  # Videos whose neighbours are scored per sparse product
+
+
+def related_videos(video_id, limit=None):
+    """Precomputed "students also bought" videos, best match first"""
+    # A primary key range scan; deleted neighbours are skipped here rather
+    # than rebuilding every list that mentions them
+    query = (Video.active()
+             .join(VideoNeighbor, VideoNeighbor.neighbor_id == Video.id)
+             .filter(VideoNeighbor.video_id == video_id)
+             .order_by(VideoNeighbor.rank))
+    return query.limit(limit).all() if limit else query.all()
+
+
+def _purchase_matrix():
+    """Binary user x video matrix (CSC) and the video id of each column"""
+    import numpy as np
+    from scipy import sparse
+
+    pairs = np.array(
+        db.session.query(Purchase.user_id, Purchase.video_id)
+        .join(Video, Video.id == Purchase.video_id)
+        .filter(Video.deleted_at.is_(None))
+        .distinct().all(),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    user_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    video_ids, cols = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csc_matrix((np.ones(len(pairs), dtype=np.float32), (rows, cols)),
+                               shape=(len(user_ids), len(video_ids)))
+    return matrix, video_ids
+
+
+def _top_neighbors(matrix, video_ids, columns, k):
+    """Yield (video_id, [(neighbor_id, score), ...]) for each column"""
+    import numpy as np
+
+    degree = np.asarray(matrix.sum(axis=0)).ravel()
+    for start in range(0, len(columns), COLUMN_BATCH):
+        batch = columns[start:start + COLUMN_BATCH]
+        # Co-purchase counts of each video in the batch against all videos
+        co = (matrix[:, batch].T @ matrix).tocsr()
+        for i, col in enumerate(batch):
+            lo, hi = co.indptr[i], co.indptr[i + 1]
+            neighbors, counts = co.indices[lo:hi], co.data[lo:hi]
+            keep = neighbors != col
+            neighbors, counts = neighbors[keep], counts[keep]
+            scores = counts / np.sqrt(degree[col] * degree[neighbors])
+            top = np.argpartition(-scores, k)[:k] if len(scores) > k else np.arange(len(scores))
+            top = top[np.argsort(-scores[top], kind='stable')]
+            yield int(video_ids[col]), [(int(video_ids[n]), float(scores[n])) for n in top]
+
+
+def _dirty_columns(matrix, video_ids, since, until):
+    """Columns whose neighbour lists can change after purchases in (since, until]"""
+    import numpy as np
+
+    bought = [video_id for (video_id,) in db.session.query(Purchase.video_id)
+              .filter(Purchase.id > since, Purchase.id <= until).distinct()]
+    cols = np.flatnonzero(np.isin(video_ids, bought))
+    # A new purchase changes the video's own counts, and with them its score
+    # against every video it has been bought together with
+    co_bought = (matrix[:, cols].T @ matrix).tocsc()
+    touched = np.flatnonzero(np.diff(co_bought.indptr))
+    return np.union1d(cols, touched)
+
+
+def update_recommendations(full=False, k=None):
+    """Refresh neighbour lists for videos affected by new purchases.
+
+    Only the rows of videos bought since the last run, and of videos bought
+    together with them, are rescored. Returns the number of videos updated.
+    """
+    import numpy as np
+
+    k = k or current_app.config.get('RECOMMENDATION_TOP_K', 10)
+    state = db.session.get(RollupState, STATE_NAME) or RollupState(name=STATE_NAME, last_id=0)
+    max_id = db.session.query(db.func.max(Purchase.id)).scalar() or 0
+    if not full and max_id <= state.last_id:
+        return 0
+
+    matrix, video_ids = _purchase_matrix()
+    if full or not state.last_id:
+        columns = np.arange(len(video_ids))
+        VideoNeighbor.query.delete()
+    else:
+        columns = _dirty_columns(matrix, video_ids, state.last_id, max_id)
+        stale = [int(video_ids[col]) for col in columns]
+        for start in range(0, len(stale), COLUMN_BATCH):
+            VideoNeighbor.query.filter(
+                VideoNeighbor.video_id.in_(stale[start:start + COLUMN_BATCH])
+            ).delete(synchronize_session=False)
+
+    rows = [{'video_id': video_id, 'rank': rank, 'neighbor_id': neighbor_id, 'score': score}
+            for video_id, neighbors in _top_neighbors(matrix, video_ids, columns, k)
+            for rank, (neighbor_id, score) in enumerate(neighbors)]
+    if rows:
+        db.session.execute(insert(VideoNeighbor), rows)
+    state.last_id = max_id
+    db.session.add(state)
+    db.session.commit()
+    return len(columns)
+
+
+def start_recommender(app):
+    """Pick up new purchases on a daemon thread"""
+    interval = app.config.get('RECOMMENDATION_INTERVAL', 300)
+
+    def run():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    update_recommendations()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Recommendation update failed')
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=run, name='recommender', daemon=True)
+    thread.start()
+    return thread
+
+
+@click.command('build-recommendations')
+@click.option('--full', is_flag=True, help='Rebuild every neighbour list, not just changed ones.')
+@with_appcontext
+def build_recommendations_command(full):
+    """Update "students also bought" lists from the purchase table."""
+    click.echo(f"Updated recommendations for {update_recommendations(full=full)} videos")
@@ -0,0 +1,72 @@
+# routing.py
+"""Read/write splitting between the primary database and read replicas.
+
+With SQLALCHEMY_REPLICA_URIS set, the reads a request makes go to one
+replica, picked when the request starts. Everything else uses the primary
+(SQLALCHEMY_DATABASE_URI):
+- writes, and every read after the session's first write
+- SELECT ... FOR UPDATE
+- background jobs and CLI commands, which run outside requests
+
+A client whose request wrote keeps reading from the primary for
+READ_PRIMARY_SECONDS. That way the page it is redirected to after paying
+or commenting shows its own write, however far the replicas lag.
+"""
+import random
+import time
+from flask import current_app, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND_PREFIX = 'replica_'
+STICKY_KEY = '_read_primary_until'  # Flask session key; time until which reads stay on the primary
+
+
+class RoutingSession(Session):
+    """Session that reads from the replica in `info['replica']`, if any"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or _is_write(clause):
+                self.info['wrote'] = True
+            elif self.info.get('replica') is not None and not self.info.get('wrote'):
+                return self.info['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _is_write(clause):
+    # Raw text() statements can't be told apart; only background jobs use them
+    return isinstance(clause, UpdateBase) or getattr(clause, '_for_update_arg', None) is not None
+
+
+def stick_to_primary(session, app):
+    """Send the client's reads to the primary for a while, after it wrote"""
+    if app.config.get('SQLALCHEMY_REPLICA_URIS'):
+        session[STICKY_KEY] = time.time() + app.config.get('READ_PRIMARY_SECONDS', 5)
+
+
+def _choose_replica():
+    if session.get(STICKY_KEY, 0) > time.time():
+        return
+    db = current_app.extensions['sqlalchemy']
+    keys = [key for key in db.engines if key and key.startswith(REPLICA_BIND_PREFIX)]
+    db.session.info['replica'] = db.engines[random.choice(keys)]
+
+
+def _remember_write(response):
+    if current_app.extensions['sqlalchemy'].session.info.get('wrote'):
+        stick_to_primary(session, current_app)
+    return response
+
+
+def init_routing(app):
+    """Add a bind per replica; call before db.init_app()"""
+    replicas = app.config.get('SQLALCHEMY_REPLICA_URIS')
+    if not replicas:
+        return
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for i, uri in enumerate(replicas):
+        binds[f'{REPLICA_BIND_PREFIX}{i}'] = uri
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.before_request(_choose_replica)
+    app.after_request(_remember_write)
@@ -0,0 +1,112 @@
+# sales.py
+from datetime import date, timedelta
+import click
+from flask import Blueprint, render_template, request
+from flask.cli import with_appcontext
+from flask_login import current_user, login_required
+from sqlalchemy import func, insert
+
+from extensions import db
+from models import Video, Purchase, DailySales
+from utils import forget_purchases, upsert
+
+bp = Blueprint('sales', __name__)
+
+MAX_DAYS = 5 * 366
+
+
+def record_purchase(user_id, video, price=None):
+    """Record a sale and fold it into the daily rollup in one transaction"""
+    price = video.price if price is None else price
+    purchase = Purchase(user_id=user_id, video_id=video.id, price=price)
+    db.session.add(purchase)
+    db.session.flush()  # Populates date_purchased
+
+    stmt = upsert(DailySales).values(video_id=video.id, day=purchase.date_purchased.date(),
+                                     count=1, revenue=price)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['video_id', 'day'],
+        set_={'count': DailySales.count + 1,
+              'revenue': DailySales.revenue + stmt.excluded.revenue},
+    ))
+    db.session.commit()
+    forget_purchases(user_id)
+    return purchase
+
+
+def rebuild_daily_sales():
+    """Recompute the rollup from scratch, e.g. after importing purchases"""
+    # Purchases recorded before prices were stored fall back to the
+    # video's current price
+    price = func.coalesce(Purchase.price, Video.price)
+    day = func.date(Purchase.date_purchased)
+    source = (db.select(Purchase.video_id, day, func.count(), func.sum(price))
+              .join(Video, Video.id == Purchase.video_id)
+              .group_by(Purchase.video_id, day))
+    db.session.query(DailySales).delete()
+    db.session.execute(insert(DailySales).from_select(
+        ['video_id', 'day', 'count', 'revenue'], source))
+    db.session.commit()
+
+
+def _bucket(days):
+    # Keep the number of rows on the page roughly constant
+    if days <= 62:
+        return 'D', '%b %d'
+    if days <= 366:
+        return 'W-MON', 'Week of %b %d'
+    return 'MS', '%b %Y'
+
+
+@bp.route("/dashboard")
+@login_required
+def dashboard():
+    # pandas is only needed here, keep it off the startup path
+    import pandas as pd
+
+    days = min(max(request.args.get('days', 90, type=int), 1), MAX_DAYS)
+    end = date.today()
+    start = end - timedelta(days=days - 1)
+    videos = {v.id: v for v in Video.active().filter_by(user_id=current_user.id)}
+    in_range = [DailySales.video_id.in_(videos), DailySales.day >= start, DailySales.day <= end]
+
+    # The database reduces the rollup to one row per video and one per
+    # day; pandas does the calendar bucketing
+    per_video = (db.session.query(DailySales.video_id, func.sum(DailySales.count),
+                                  func.sum(DailySales.revenue))
+                 .filter(*in_range).group_by(DailySales.video_id).all())
+    per_day = (db.session.query(DailySales.day, func.sum(DailySales.count),
+                                func.sum(DailySales.revenue))
+               .filter(*in_range).group_by(DailySales.day).all())
+
+    daily = pd.DataFrame(per_day, columns=['day', 'count', 'revenue'])
+    daily['day'] = pd.to_datetime(daily['day'])
+    daily = (daily.set_index('day')
+             .reindex(pd.date_range(start, end, freq='D'), fill_value=0))
+    freq, label = _bucket(days)
+    # Bins start at, and are labelled by, their first day; weekly bins
+    # would otherwise be labelled by the Monday they end on
+    periods = daily.resample(freq, closed='left', label='left').sum()
+    peak = periods['revenue'].max() or 1
+
+    by_video = sorted(
+        ({'video': videos[video_id], 'count': count, 'revenue': revenue}
+         for video_id, count, revenue in per_video),
+        key=lambda row: row['revenue'], reverse=True,
+    )
+    return render_template(
+        'dashboard.html', title='Sales Dashboard', days=days,
+        total_count=int(daily['count'].sum()), total_revenue=float(daily['revenue'].sum()),
+        by_video=by_video,
+        periods=[{'label': ts.strftime(label), 'count': int(row['count']),
+                  'revenue': float(row['revenue']), 'width': 100 * row['revenue'] / peak}
+                 for ts, row in periods.iterrows()],
+    )
+
+
+@click.command('rebuild-sales')
+@with_appcontext
+def rebuild_sales_command():
+    """Rebuild the daily_sales rollup from the purchase table."""
+    rebuild_daily_sales()
+    click.echo(f"Rebuilt {DailySales.query.count()} daily sales rows")
@@ -0,0 +1,134 @@
+# sessions.py
+import random
+import secrets
+from datetime import datetime
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+from itsdangerous import BadSignature, Signer
+
+from extensions import db, get_redis
+from models import StoredSession
+from utils import upsert
+
+PURGE_PROBABILITY = 0.01  # Share of database session writes that also purge expired rows
+
+
+class ServerSession(SecureCookieSession):
+    """Session dict whose data lives in a store; the cookie holds only its id"""
+
+    def __init__(self, initial=None, sid=None):
+        super().__init__(initial)
+        self.sid = sid
+        self.opened_user = self.get('_user_id')
+
+
+class RedisSessionStore:
+    def __init__(self, client, prefix='session:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, sid):
+        data = self.client.get(self.prefix + sid)
+        return data.decode('utf-8') if data is not None else None
+
+    def set(self, sid, data, lifetime):
+        self.client.setex(self.prefix + sid, lifetime, data)
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+
+class DatabaseSessionStore:
+    """Sessions in the app database; expired rows are purged now and then"""
+
+    def get(self, sid):
+        with db.engine.connect() as conn:
+            return conn.execute(db.select(StoredSession.data).where(
+                StoredSession.id == sid, StoredSession.expires_at > datetime.utcnow())).scalar()
+
+    def set(self, sid, data, lifetime):
+        # Own transaction, so nothing the view left pending is committed
+        stmt = upsert(StoredSession).values(id=sid, data=data,
+                                            expires_at=datetime.utcnow() + lifetime)
+        with db.engine.begin() as conn:
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=['id'], set_={'data': stmt.excluded.data,
+                                             'expires_at': stmt.excluded.expires_at}))
+            if random.random() < PURGE_PROBABILITY:
+                conn.execute(db.delete(StoredSession).where(StoredSession.expires_at < datetime.utcnow()))
+
+    def delete(self, sid):
+        with db.engine.begin() as conn:
+            conn.execute(db.delete(StoredSession).where(StoredSession.id == sid))
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keeps session data in a shared store so any node can serve any user.
+
+    The cookie carries a signed random id. The id is replaced when the
+    logged-in user changes, so a session id seen before login is useless
+    afterwards.
+    """
+
+    serializer = TaggedJSONSerializer()
+    salt = 'server-session'
+
+    def __init__(self, store):
+        self.store = store
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt=self.salt)
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode('ascii')
+            except BadSignature:
+                sid = None
+            data = self.store.get(sid) if sid else None
+            if data is not None:
+                return ServerSession(self.serializer.loads(data), sid=sid)
+        return ServerSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+        if not session:
+            if session.sid:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not (session.modified or session.sid is None or self.should_set_cookie(app, session)):
+            return
+
+        if session.sid and session.get('_user_id') != session.opened_user:
+            self.store.delete(session.sid)
+            session.sid = None
+        session.sid = session.sid or secrets.token_urlsafe(32)
+        self.store.set(session.sid, self.serializer.dumps(dict(session)),
+                       app.permanent_session_lifetime)
+        response.set_cookie(
+            name, self._signer(app).sign(session.sid).decode('ascii'),
+            expires=self.get_expiration_time(app, session), domain=domain, path=path,
+            httponly=self.get_cookie_httponly(app), secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def init_sessions(app):
+    """Swap Flask's cookie sessions for SESSION_BACKEND's store"""
+    backend = app.config.get('SESSION_BACKEND', 'cookie')
+    if backend == 'cookie':
+        return
+    if backend == 'redis':
+        store = RedisSessionStore(get_redis(app))
+    elif backend == 'database':
+        store = DatabaseSessionStore()
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+    app.session_interface = ServerSideSessionInterface(store)
@@ -0,0 +1,32 @@
+// static/js/availability.js
+
+// Check availability once typing pauses, not on every keystroke
+(function() {
+    const form = document.querySelector('form[data-availability-url]');
+    if (!form) return;
+    const url = form.dataset.availabilityUrl;
+
+    ['username', 'email'].forEach(function(name) {
+        const input = document.getElementById(name);
+        let timer = null;
+        let controller = null;
+
+        input.addEventListener('input', function() {
+            clearTimeout(timer);
+            input.classList.remove('is-valid', 'is-invalid');
+            const value = input.value.trim();
+            if (!value || !input.checkValidity()) return;
+            timer = setTimeout(function() {
+                if (controller) controller.abort();
+                controller = new AbortController();
+                fetch(url + '?' + new URLSearchParams({[name]: value}), {signal: controller.signal})
+                    .then(response => response.json())
+                    .then(data => {
+                        if (input.value.trim() !== value) return;
+                        input.classList.add(data[name] ? 'is-valid' : 'is-invalid');
+                    })
+                    .catch(() => {});
+            }, 400);
+        });
+    });
+})();
@@ -0,0 +1,40 @@
+// static/js/video_interactions.js
+
+// Post comments and ratings without reloading the page; the server
+// sends back only the new comment or the new average
+document.querySelectorAll('form.js-interaction').forEach(function(form) {
+    form.addEventListener('submit', function(e) {
+        if (form.dataset.fallback) return;
+        e.preventDefault();
+        const button = form.querySelector('input[type=submit]');
+        button.disabled = true;
+        fetch(form.dataset.url, {method: 'POST', body: new FormData(form),
+                                 headers: {'Accept': 'application/json'}})
+            .then(response => response.json().then(data => ({ok: response.ok, data: data})))
+            .then(({ok, data}) => {
+                button.disabled = false;
+                form.querySelectorAll('.text-danger').forEach(el => el.remove());
+                if (!ok) {
+                    Object.values(data.errors || {}).flat().forEach(function(message) {
+                        const error = document.createElement('div');
+                        error.className = 'text-danger';
+                        error.textContent = message;
+                        form.querySelector('.form-group').appendChild(error);
+                    });
+                    return;
+                }
+                if (data.html !== undefined) {
+                    document.getElementById('comment-list').insertAdjacentHTML('afterbegin', data.html);
+                    form.reset();
+                } else {
+                    document.getElementById('average-rating').textContent = data.average_rating;
+                }
+            })
+            .catch(function() {
+                // Fall back to the regular POST and redirect
+                form.dataset.fallback = '1';
+                button.disabled = false;
+                button.click();
+            });
+    });
+});
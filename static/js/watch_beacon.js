@@ -0,0 +1,35 @@
+// static/js/watch_beacon.js
+
+// Report playback to the analytics beacon endpoint
+(function() {
+    const player = document.getElementById('lesson-player');
+    if (!player || !navigator.sendBeacon) return;
+    const url = player.dataset.eventsUrl;
+    const playId = Math.random().toString(36).slice(2) + Date.now().toString(36);
+    let viewed = false;
+    let lastSent = 0;
+
+    function send(kind) {
+        const event = {kind: kind, play_id: playId, position: player.currentTime,
+                       duration: player.duration || null};
+        navigator.sendBeacon(url, new Blob([JSON.stringify(event)], {type: 'application/json'}));
+    }
+
+    player.addEventListener('play', function() {
+        if (!viewed) {
+            viewed = true;
+            send('view');
+        }
+    });
+    player.addEventListener('timeupdate', function() {
+        // One heartbeat every 15 seconds of playback
+        if (player.currentTime - lastSent >= 15) {
+            lastSent = player.currentTime;
+            send('progress');
+        }
+    });
+    player.addEventListener('ended', function() { send('ended'); });
+    window.addEventListener('pagehide', function() {
+        if (viewed) send('progress');
+    });
+})();
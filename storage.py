@@ -0,0 +1,207 @@
+# storage.py
+import hashlib
+import hmac
+import os
+import tempfile
+import time
+from urllib.parse import quote, urlencode
+from flask import current_app
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def content_key(digest, filename):
+    """Storage key for a file: its SHA-256 plus the original extension"""
+    _, ext = os.path.splitext(filename)
+    return digest + ext.lower()
+
+
+def _spool_and_hash(fileobj):
+    """Copy an upload to a temp file while hashing it; returns (digest, file)"""
+    sha = hashlib.sha256()
+    spooled = tempfile.SpooledTemporaryFile(max_size=8 * CHUNK_SIZE)
+    for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b''):
+        sha.update(chunk)
+        spooled.write(chunk)
+    spooled.seek(0)
+    return sha.hexdigest(), spooled
+
+
+class LocalStorage:
+    """Files in a local directory, served through the media blueprint"""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def save(self, fileobj, filename):
+        # Write to a temp file in the same directory while hashing, then
+        # move it into place; identical content ends up under the same key
+        sha = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b''):
+                    sha.update(chunk)
+                    out.write(chunk)
+            key = content_key(sha.hexdigest(), filename)
+            os.chmod(tmp_path, 0o644)
+            if os.path.exists(self.path(key)):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, self.path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def delete(self, key):
+        if os.path.exists(self.path(key)):
+            os.remove(self.path(key))
+
+    def keys(self):
+        """Yield (key, modified timestamp) for every stored file"""
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    yield entry.name, entry.stat().st_mtime
+
+    def url(self, key, expires_in=None):
+        # Local files have no direct URL; callers fall back to the media route
+        return None
+
+
+class S3Storage:
+    """Any S3-compatible object store (AWS, MinIO, a local moto server)"""
+
+    def __init__(self, bucket, endpoint_url=None, region=None, prefix=''):
+        # boto3 is only needed when this backend is configured
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+
+    def _object_key(self, key):
+        return self.prefix + key
+
+    def save(self, fileobj, filename):
+        digest, spooled = _spool_and_hash(fileobj)
+        key = content_key(digest, filename)
+        with spooled:
+            if not self.exists(key):
+                self.client.upload_fileobj(spooled, self.bucket, self._object_key(key))
+        return key
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def keys(self):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get('Contents', []):
+                yield obj['Key'][len(self.prefix):], obj['LastModified'].timestamp()
+
+    def url(self, key, expires_in=300):
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': self._object_key(key)},
+            ExpiresIn=expires_in,
+        )
+
+
+def sign_cdn_path(path, expires, signing_key):
+    message = f"{path}:{expires}".encode()
+    return hmac.new(signing_key.encode(), message, hashlib.sha256).hexdigest()
+
+
+def verify_cdn_signature(path, expires, signature, signing_key, now=None):
+    """Check a signed CDN URL, as a CDN edge worker would"""
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    if expires < (now or time.time()):
+        return False
+    expected = sign_cdn_path(path, expires, signing_key)
+    return hmac.compare_digest(expected, signature or '')
+
+
+class CDNStorage:
+    """Wraps an origin backend and hands out signed, expiring CDN URLs.
+
+    Uploads and deletes go to the origin; viewers fetch from the CDN, which
+    validates `expires` and `signature` before pulling from the origin.
+    """
+
+    def __init__(self, origin, cdn_url, signing_key):
+        self.origin = origin
+        self.cdn_url = cdn_url.rstrip('/')
+        self.signing_key = signing_key
+
+    def save(self, fileobj, filename):
+        return self.origin.save(fileobj, filename)
+
+    def exists(self, key):
+        return self.origin.exists(key)
+
+    def delete(self, key):
+        self.origin.delete(key)
+
+    def keys(self):
+        return self.origin.keys()
+
+    def url(self, key, expires_in=300):
+        path = '/' + quote(key)
+        expires = int(time.time()) + expires_in
+        query = urlencode({'expires': expires,
+                           'signature': sign_cdn_path(path, expires, self.signing_key)})
+        return f"{self.cdn_url}{path}?{query}"
+
+
+def init_storage(app):
+    """Build the configured backend and attach it to the app"""
+    backend = app.config.get('STORAGE_BACKEND', 'local')
+    if backend == 's3':
+        storage = S3Storage(app.config['S3_BUCKET'],
+                            endpoint_url=app.config.get('S3_ENDPOINT_URL'),
+                            region=app.config.get('S3_REGION'),
+                            prefix=app.config.get('S3_PREFIX', ''))
+    elif backend == 'local':
+        storage = LocalStorage(app.config['UPLOAD_FOLDER'])
+    else:
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+    if app.config.get('CDN_URL'):
+        if not app.config.get('CDN_SIGNING_KEY'):
+            raise ValueError("CDN_SIGNING_KEY is required when CDN_URL is set")
+        storage = CDNStorage(storage, app.config['CDN_URL'], app.config['CDN_SIGNING_KEY'])
+
+    app.extensions['storage'] = storage
+    return storage
+
+
+def get_storage():
+    return current_app.extensions['storage']
+
+
+def media_url(key):
+    """Short-lived URL viewers can fetch directly, or None for local files"""
+    return get_storage().url(key, expires_in=current_app.config.get('SIGNED_URL_TTL', 300))
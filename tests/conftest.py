@@ -0,0 +1,41 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Build an app on a throwaway SQLite database; keyword args override config"""
+    from app import create_app
+
+    def make(**overrides):
+        settings = {
+            'SECRET_KEY': 'test',
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + str(tmp_path / 'primary.db'),
+            'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+            'JINJA_BYTECODE_CACHE_DIR': None,
+            'TESTING': True,
+            'WTF_CSRF_ENABLED': False,
+        }
+        settings.update(overrides)
+        return create_app(type('TestConfig', (Config,), settings), workers=False)
+
+    return make
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    """fakeredis server behind every client built from REDIS_URL"""
+    fakeredis = pytest.importorskip('fakeredis')
+    import redis
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, 'from_url',
+                        classmethod(lambda cls, url, **kwargs: fakeredis.FakeRedis(server=server)))
+    return server
@@ -0,0 +1,81 @@
+# tests/test_bus.py
+import time
+
+import pytest
+
+from bus import DatabaseBus, get_bus
+from extensions import db
+from models import Rating, User, Video
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def nodes(make_app, redis_server):
+    """Two apps sharing a database and a Redis server, as two nodes would"""
+    first, second = make_app(BUS_BACKEND='redis'), make_app(BUS_BACKEND='redis')
+    with first.app_context():
+        db.create_all(bind_key=None)
+        db.session.add(User(id=1, username='student', email='s@example.com', password='x'))
+        db.session.add(Video(id=1, title='Lesson', filename='a.mp4', user_id=1))
+        db.session.commit()
+    # Each node's listener thread must be subscribed before anything is published
+    client = first.extensions['redis']
+    assert wait_for(lambda: client.pubsub_numsub('invalidations')[0][1] == 2)
+    return first, second
+
+
+def subscribe(app, topic):
+    received = []
+    app.extensions['bus'].subscribe(topic, received.append)
+    return received
+
+
+def test_redis_bus_reaches_other_nodes_once(nodes):
+    first, second = nodes
+    on_first, on_second = subscribe(first, 'ratings'), subscribe(second, 'ratings')
+
+    with first.app_context():
+        get_bus().publish('ratings', 1)
+
+    assert wait_for(lambda: on_second == ['1'])
+    time.sleep(0.1)
+    # Delivered locally straight away, and its own broadcast is skipped
+    assert on_first == ['1']
+
+
+def test_committed_rating_invalidates_other_nodes(nodes):
+    first, second = nodes
+    on_second = subscribe(second, 'ratings')
+
+    with first.app_context():
+        db.session.add(Rating(video_id=1, user_id=1, score=5))
+        db.session.commit()
+
+    assert wait_for(lambda: on_second == ['1'])
+
+
+def test_database_bus_delivers_through_the_table(make_app):
+    app = make_app()
+    with app.app_context():
+        db.create_all(bind_key=None)
+        sender, receiver = DatabaseBus(), DatabaseBus()
+        on_sender, on_receiver = [], []
+        sender.subscribe('ratings', on_sender.append)
+        receiver.subscribe('ratings', on_receiver.append)
+        sender.poll()
+        receiver.poll()
+
+        sender.publish('ratings', 3)
+
+        assert receiver.poll() == 1
+        assert on_receiver == ['3']
+        sender.poll()
+        assert on_sender == ['3']
@@ -0,0 +1,55 @@
+# tests/test_media.py
+import io
+
+import pytest
+
+from extensions import db
+from models import Purchase, User, Video
+
+
+@pytest.fixture
+def app(make_app):
+    """Uploader 1, buyer 2 and stranger 3; video 1 is stored locally"""
+    app = make_app()
+    with app.app_context():
+        db.create_all(bind_key=None)  # Only the primary; other tests register replica binds
+        key = app.extensions['storage'].save(io.BytesIO(b'video bytes'), 'lesson.mp4')
+        db.session.add_all([User(id=i, username=f'user{i}', email=f'user{i}@example.com', password='x')
+                            for i in (1, 2, 3)])
+        db.session.add(Video(id=1, title='Lesson', filename=key, user_id=1))
+        db.session.add(Purchase(user_id=2, video_id=1))
+        db.session.commit()
+    app.video_key = key
+    return app
+
+
+def get_upload(app, user_id=None):
+    client = app.test_client()
+    if user_id:
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+    return client.get(f'/uploads/{app.video_key}')
+
+
+def test_buyer_and_uploader_get_the_file(app):
+    for user_id in (1, 2):
+        response = get_upload(app, user_id)
+        assert response.status_code == 200
+        assert response.data == b'video bytes'
+
+
+def test_anonymous_requests_are_sent_to_login(app):
+    response = get_upload(app)
+    assert response.status_code == 302
+    assert '/login' in response.location
+
+
+def test_other_users_are_forbidden(app):
+    assert get_upload(app, 3).status_code == 403
+
+
+def test_deleted_videos_are_forbidden(app):
+    with app.app_context():
+        db.session.get(Video, 1).deleted_at = db.func.now()
+        db.session.commit()
+    assert get_upload(app, 2).status_code == 403
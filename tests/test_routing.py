@@ -0,0 +1,78 @@
+# tests/test_routing.py
+import time
+
+import pytest
+
+from extensions import db
+from models import User
+from routing import STICKY_KEY
+
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    """Primary and replica as two SQLite files, each with a user only it has"""
+    app = make_app(SQLALCHEMY_REPLICA_URIS=['sqlite:///' + str(tmp_path / 'replica.db')],
+                   READ_PRIMARY_SECONDS=5)
+
+    @app.route('/_test/users')
+    def users():
+        return ','.join(user.username for user in User.query.order_by(User.id))
+
+    @app.route('/_test/locked')
+    def locked():
+        return ','.join(user.username for user in User.query.with_for_update().order_by(User.id))
+
+    @app.route('/_test/write', methods=['POST'])
+    def write():
+        db.session.add(User(username='written', email='written@example.com', password='x'))
+        db.session.commit()
+        return users()
+
+    with app.app_context():
+        replica = db.engines['replica_0']
+        db.create_all()
+        db.metadata.create_all(replica)
+        db.session.add(User(username='on_primary', email='primary@example.com', password='x'))
+        db.session.commit()
+        with replica.begin() as conn:
+            conn.execute(User.__table__.insert(),
+                         {'username': 'on_replica', 'email': 'replica@example.com',
+                          'image_file': 'default.jpg', 'password': 'x'})
+    return app
+
+
+def test_request_reads_go_to_the_replica(app):
+    assert app.test_client().get('/_test/users').text == 'on_replica'
+
+
+def test_writes_go_to_the_primary_and_reads_after_them_follow(app):
+    response = app.test_client().post('/_test/write')
+    assert response.text == 'on_primary,written'
+    with app.app_context():
+        with db.engines['replica_0'].connect() as conn:
+            assert conn.execute(db.select(User.username)).scalars().all() == ['on_replica']
+
+
+def test_client_reads_primary_for_the_stickiness_window(app):
+    client = app.test_client()
+    client.post('/_test/write')
+    assert client.get('/_test/users').text == 'on_primary,written'
+
+    with client.session_transaction() as session:
+        assert session[STICKY_KEY] > time.time()
+        session[STICKY_KEY] = time.time() - 1
+    assert client.get('/_test/users').text == 'on_replica'
+
+
+def test_other_clients_keep_reading_the_replica(app):
+    app.test_client().post('/_test/write')
+    assert app.test_client().get('/_test/users').text == 'on_replica'
+
+
+def test_select_for_update_goes_to_the_primary(app):
+    assert app.test_client().get('/_test/locked').text == 'on_primary'
+
+
+def test_reads_outside_requests_use_the_primary(app):
+    with app.app_context():
+        assert [user.username for user in User.query] == ['on_primary']
@@ -0,0 +1,74 @@
+# tests/test_sessions.py
+import pytest
+from flask import session
+
+from extensions import db
+
+
+@pytest.fixture(params=['redis', 'database'])
+def make_node(request, make_app):
+    """Build apps that share one session store, as nodes behind a balancer would"""
+    if request.param == 'redis':
+        request.getfixturevalue('redis_server')
+
+    def make():
+        app = make_app(SESSION_BACKEND=request.param)
+
+        @app.route('/_test/set/<key>/<value>')
+        def set_value(key, value):
+            session[key] = value
+            return 'ok'
+
+        @app.route('/_test/get/<key>')
+        def get_value(key):
+            return session.get(key, '')
+
+        @app.route('/_test/clear')
+        def clear():
+            session.clear()
+            return 'ok'
+
+        with app.app_context():
+            db.create_all(bind_key=None)
+        return app
+
+    return make
+
+
+def test_session_round_trips_between_nodes(make_node):
+    first, second = make_node(), make_node()
+    client = first.test_client()
+    client.get('/_test/set/instrument/tenor sax')
+
+    cookie = client.get_cookie('session')
+    assert 'tenor' not in cookie.value  # The cookie holds only the signed id
+    other = second.test_client()
+    other.set_cookie('session', cookie.value)
+    assert other.get('/_test/get/instrument').text == 'tenor sax'
+
+
+def test_login_replaces_the_session_id(make_node):
+    app = make_node()
+    client = app.test_client()
+    client.get('/_test/set/instrument/flute')
+    before = client.get_cookie('session').value
+
+    client.get('/_test/set/_user_id/1')
+    assert client.get_cookie('session').value != before
+    assert client.get('/_test/get/instrument').text == 'flute'
+
+    stale = app.test_client()
+    stale.set_cookie('session', before)
+    assert stale.get('/_test/get/instrument').text == ''
+
+
+def test_cleared_session_is_deleted(make_node):
+    app = make_node()
+    client = app.test_client()
+    client.get('/_test/set/instrument/clarinet')
+    cookie = client.get_cookie('session').value
+    client.get('/_test/clear')
+
+    stale = app.test_client()
+    stale.set_cookie('session', cookie)
+    assert stale.get('/_test/get/instrument').text == ''
@@ -1,10 +1,49 @@
 # utils.py
 import os
 import secrets
-from PIL import Image
-from flask import current_app
+from flask import current_app, g
+from extensions import db
+from models import Purchase, Rating, Video
+from cache import cache
+
+def allowed_file(filename):
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
+
+def purchased_video_ids(user_id):
+    # Read once per request and never cached across requests: a purchase
+    # recorded by another worker must count on the very next page
+    memo = g.setdefault('purchased_video_ids', {})
+    if user_id not in memo:
+        memo[user_id] = frozenset(
+            video_id for (video_id,) in db.session.query(Purchase.video_id).filter_by(user_id=user_id))
+    return memo[user_id]
+
+def forget_purchases(user_id):
+    """Drop the request's copy of a user's purchases, after recording one"""
+    g.get('purchased_video_ids', {}).pop(user_id, None)
+
+def has_purchased(user_id, video_id):
+    return video_id in purchased_video_ids(user_id)
+
+def can_watch(user_id, filename):
+    """Whether the user bought or uploaded a live video stored as `filename`"""
+    # Identical uploads share a key, so any of its videos grants access
+    videos = (db.session.query(Video.id, Video.user_id)
+              .filter(Video.filename == filename, Video.deleted_at.is_(None)))
+    return any(uploader == user_id or has_purchased(user_id, video_id)
+               for video_id, uploader in videos)
+
+def average_rating(video_id):
+    def load():
+        avg = db.session.query(db.func.avg(Rating.score)).filter(Rating.video_id == video_id).scalar()
+        return round(avg, 2) if avg else 'No ratings yet'
+    return cache.get_or_load('ratings', video_id, load)
 
 def save_picture(form_picture):
+    # Pillow is only needed when a profile picture is uploaded
+    from PIL import Image
+
     random_hex = secrets.token_hex(8)
     _, f_ext = os.path.splitext(form_picture.filename)
     picture_fn = random_hex + f_ext
@@ -17,4 +56,14 @@ def save_picture(form_picture):
 
     i.save(picture_path)
 
-    return picture_fn
\ No newline at end of file
+    return picture_fn
+
+def upsert(model):
+    """INSERT statement for `model` supporting on_conflict_do_update()"""
+    # SQLite and PostgreSQL spell ON CONFLICT the same way in SQLAlchemy,
+    # but each needs its own dialect construct
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)